@@ -0,0 +1,52 @@
+import sys
+import json
+import argparse
+from financial_analysis import ASSUMPTION_KEYS, build_analysis_stages
+from pipeline import Pipeline
+
+# Headless entry point: runs the analysis stages only, so neither matplotlib nor fpdf is imported.
+# Suited to CLI calls and serverless handlers that only need the numbers, e.g. analyze(assumptions).to_json()
+
+def load_assumptions(assumptions_path):
+    # A JSON object of analysis assumptions, as in a batch manifest spec; other keys are ignored
+    with open(assumptions_path) as f:
+        spec = json.load(f)
+    return {key: spec[key] for key in ASSUMPTION_KEYS if key in spec}
+
+def analyze(assumptions=None, scenario_dir=None, simulation_workers=None, chunk_size=None):
+    pipeline = Pipeline(build_analysis_stages(scenario_dir=scenario_dir, simulation_workers=simulation_workers, chunk_size=chunk_size),
+                        inputs={'assumptions': assumptions or {}})
+    return pipeline.run(['financial_data'])['financial_data']
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the financial analysis without charts or PDF and print financial_data as JSON.')
+    parser.add_argument('--assumptions', default=None,
+                        help='JSON file of analysis assumptions (tam, som, growth_rates, ebitda_margin, ...)')
+    parser.add_argument('--history', default=None,
+                        help='CSV of historical revenue (period, value) to backtest the projection model against')
+    parser.add_argument('--scenario-grid', default=None,
+                        help='Write every scenario of the grid to this directory, one .npy file per column')
+    parser.add_argument('--simulations', type=int, default=None,
+                        help='Monte Carlo revenue paths (default 1000); runs larger than one chunk stream across processes')
+    parser.add_argument('--simulation-workers', type=int, default=None,
+                        help='Processes for chunked Monte Carlo runs (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Monte Carlo paths simulated per chunk (default 100000)')
+    parser.add_argument('--output', default=None, help='Write the JSON to this file instead of standard output')
+    args = parser.parse_args()
+
+    assumptions = load_assumptions(args.assumptions) if args.assumptions else {}
+    if args.history:
+        assumptions['history'] = args.history
+    if args.simulations:
+        assumptions['num_simulations'] = args.simulations
+    financial_data_json = analyze(assumptions, args.scenario_grid, args.simulation_workers, args.chunk_size).to_json(indent=2)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(financial_data_json)
+    else:
+        sys.stdout.write(financial_data_json + '\n')
+
+if __name__ == "__main__":
+    main()
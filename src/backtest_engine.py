@@ -0,0 +1,82 @@
+import csv
+import numpy as np
+from monte_carlo import simulate_revenue_paths
+
+DEFAULT_HORIZON = 12
+MIN_WINDOW = 12
+
+# Stand-in history when no actuals are supplied: ten years of monthly revenue from the Monte Carlo
+# growth process at the default annual growth and volatility, with a fixed seed
+SIMULATED_MONTHS = 120
+SIMULATED_ANNUAL_GROWTH = 0.25
+SIMULATED_ANNUAL_VOLATILITY = 0.15
+
+def load_actuals(history_path):
+    # CSV with a period label in the first column and revenue in the second; a header row is skipped
+    periods, values = [], []
+    with open(history_path, newline='') as f:
+        for row in csv.reader(f):
+            if not row:
+                continue
+            try:
+                value = float(row[1])
+            except ValueError:
+                if not values:
+                    continue
+                raise
+            periods.append(row[0])
+            values.append(value)
+    if len(values) < MIN_WINDOW + 1:
+        raise ValueError(f"Backtesting needs at least {MIN_WINDOW + 1} historical values, got {len(values)} in {history_path}")
+    return periods, np.array(values)
+
+def simulated_actuals(initial_revenue, num_months=SIMULATED_MONTHS, seed=0):
+    monthly_growth = (1 + SIMULATED_ANNUAL_GROWTH) ** (1 / 12) - 1
+    monthly_volatility = SIMULATED_ANNUAL_VOLATILITY / np.sqrt(12)
+    values = simulate_revenue_paths(initial_revenue, 1, num_months, monthly_growth, monthly_volatility, seed=seed)[0]
+    return [f'M{month}' for month in range(1, num_months + 1)], values
+
+def rolling_origin_forecasts(actuals, horizon=DEFAULT_HORIZON, min_window=MIN_WINDOW):
+    # Every cutoff re-fits the projection model, compound growth from the first value, on the expanding window
+    # before it and forecasts the next `horizon` periods. Returns (num_origins, horizon) forecasts and the
+    # matching actuals, NaN where a horizon runs past the end of the history
+    actuals = np.asarray(actuals, dtype=np.float64)
+    log_actuals = np.log(actuals)
+    origins = np.arange(min_window, len(actuals))
+    log_growth = (log_actuals[origins - 1] - log_actuals[0]) / (origins - 1)
+    steps = np.arange(1, horizon + 1)
+    forecasts = np.exp(log_actuals[origins - 1, np.newaxis] + log_growth[:, np.newaxis] * steps)
+
+    targets = origins[:, np.newaxis] + steps - 1
+    in_range = targets < len(actuals)
+    observed = np.where(in_range, actuals[np.minimum(targets, len(actuals) - 1)], np.nan)
+    return origins, np.where(in_range, forecasts, np.nan), observed
+
+def backtest_metrics(forecasts, observed):
+    errors = forecasts - observed
+    relative = errors / observed
+    return {
+        'mape': float(np.nanmean(np.abs(relative))),
+        'rmse': float(np.sqrt(np.nanmean(errors ** 2))),
+        'bias': float(np.nanmean(relative)),
+        'mape_by_horizon': np.nanmean(np.abs(relative), axis=0).tolist(),
+        'bias_by_horizon': np.nanmean(relative, axis=0).tolist(),
+    }
+
+def run_backtest(periods, actuals, source, horizon=DEFAULT_HORIZON, min_window=MIN_WINDOW):
+    origins, forecasts, observed = rolling_origin_forecasts(actuals, horizon, min_window)
+
+    # Forecast made `horizon` periods earlier for each period, aligned with the actuals for charting
+    horizon_forecasts = np.full(len(actuals), np.nan)
+    targets = origins + horizon - 1
+    in_range = targets < len(actuals)
+    horizon_forecasts[targets[in_range]] = forecasts[in_range, -1]
+
+    backtest_data = backtest_metrics(forecasts, observed)
+    backtest_data.update({
+        'source': source,
+        'periods': list(periods),
+        'num_origins': len(origins),
+        'horizon': horizon,
+    })
+    return backtest_data, horizon_forecasts
@@ -1,17 +1,34 @@
-import matplotlib.pyplot as plt
+from chart_output import save_chart
+import numpy as np
 
 def generate_backtesting_chart(image_path, financial_data):
+    import matplotlib.pyplot as plt
     actual_values = financial_data['actual_values']
     forecasted_values = financial_data['forecasted_values']
-    years = financial_data['years'][:len(actual_values)]  # Use all available years
+    backtest_data = financial_data['backtest_data']
+    periods = np.arange(1, len(actual_values) + 1)
+    horizon = backtest_data['horizon']
 
-    plt.figure(figsize=(10, 6))
-    plt.plot(years, actual_values, label='Actual Values', marker='o')
-    plt.plot(years, forecasted_values[:len(actual_values)], label='Forecasted Values', marker='o')
-    plt.xlabel('Year')
-    plt.ylabel('Amount (USD)')
-    plt.title('Backtesting: Actual vs Forecasted Values')
-    plt.legend()
-    plt.grid(True)
-    plt.savefig(f'{image_path}/backtesting_chart.png')
-    plt.close()
\ No newline at end of file
+    fig, (ax_series, ax_errors) = plt.subplots(1, 2, figsize=(14, 6))
+    ax_series.plot(periods, actual_values, label='Actual Values')
+    ax_series.plot(periods, forecasted_values, label=f'Forecast Made {horizon} Periods Earlier')
+    ax_series.set_xlabel('Period')
+    ax_series.set_ylabel('Amount (USD)')
+    ax_series.set_title(f"Backtesting on {backtest_data['source']}")
+    ax_series.legend()
+    ax_series.grid(True)
+
+    horizons = np.arange(1, horizon + 1)
+    ax_errors.bar(horizons, np.array(backtest_data['mape_by_horizon']) * 100, label='MAPE')
+    ax_errors.plot(horizons, np.array(backtest_data['bias_by_horizon']) * 100, color='black', marker='o', label='Bias')
+    ax_errors.axhline(0, color='grey', linewidth=1)
+    ax_errors.set_xlabel('Forecast Horizon (periods)')
+    ax_errors.set_ylabel('Error (%)')
+    ax_errors.set_title(f"Rolling-Origin Errors over {backtest_data['num_origins']} Origins")
+    ax_errors.legend()
+    ax_errors.grid(True)
+
+    plt.tight_layout()
+    chart = save_chart(image_path, 'backtesting_chart.png')
+    plt.close()
+    return chart
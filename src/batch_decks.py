@@ -0,0 +1,109 @@
+import os
+import csv
+import json
+import time
+import logging
+import argparse
+from financial_analysis import ASSUMPTION_KEYS
+from pitch_deck import build_deck_stages, deck_spec_inputs
+from slide_templates import SlideCache
+from chart_rendering import create_chart_executor
+from chart_cache import ChartCache
+from chart_output import QUALITY_PROFILES
+from pipeline import Pipeline
+
+def _parse_csv_row(row):
+    spec = {}
+    for key, value in row.items():
+        if value is None or value == '':
+            continue
+        if key == 'growth_rates':
+            spec[key] = [float(rate) for rate in value.split(';')]
+        elif key == 'history':
+            spec[key] = value
+        elif key == 'num_simulations':
+            spec[key] = int(value)
+        elif key in ASSUMPTION_KEYS:
+            spec[key] = float(value)
+        else:
+            spec[key] = value
+    return spec
+
+def load_manifest(manifest_path):
+    if manifest_path.endswith('.csv'):
+        with open(manifest_path, newline='') as f:
+            return [_parse_csv_row(row) for row in csv.DictReader(f)]
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    return manifest['decks'] if isinstance(manifest, dict) else manifest
+
+def split_deck_spec(spec, index):
+    deck_id = str(spec.get('id', f'deck_{index + 1}'))
+    company, assumptions = deck_spec_inputs(spec)
+    return deck_id, company, assumptions
+
+def generate_decks(specs, output_dir, charts_dir=None, max_workers=None, chart_cache=None, quality=None,
+                   image_dpi=None, simulation_workers=None, chunk_size=None):
+    # One process, one chart pool and one chart cache for the whole batch, so imports, workers
+    # and charts shared between decks (e.g. the static competitive charts) are only paid for once
+    chart_cache = chart_cache or ChartCache()
+    # Slides that come out the same for several decks, e.g. the static company slides, are laid out once
+    slide_cache = SlideCache()
+    os.makedirs(output_dir, exist_ok=True)
+    pdf_paths = {}
+    failures = {}
+
+    start = time.perf_counter()
+    with create_chart_executor(max_workers) as executor:
+        for index, spec in enumerate(specs):
+            deck_id, company, assumptions = split_deck_spec(spec, index)
+            deck_start = time.perf_counter()
+            pipeline = Pipeline(build_deck_stages(max_workers, chart_cache, executor, quality, image_dpi, slide_cache,
+                                                  simulation_workers=simulation_workers, chunk_size=chunk_size), inputs={
+                'image_path': os.path.join(charts_dir, deck_id) if charts_dir else None,
+                'assumptions': assumptions,
+                'company': company,
+                'output_path': spec.get('output', os.path.join(output_dir, f'{deck_id}.pdf'))
+            })
+            try:
+                pdf_paths[deck_id] = pipeline.run(['pdf_path'])['pdf_path']
+            except Exception as e:
+                failures[deck_id] = e
+                logging.error(f"Deck '{deck_id}' failed: {str(e)}")
+            else:
+                logging.info(f"Deck '{deck_id}' built in {time.perf_counter() - deck_start:.2f}s")
+    elapsed = time.perf_counter() - start
+
+    decks_per_minute = len(pdf_paths) / elapsed * 60 if elapsed else 0
+    logging.info(f"Built {len(pdf_paths)} of {len(specs)} decks in {elapsed:.1f}s ({decks_per_minute:.1f} decks/minute)")
+    chart_cache.log_report()
+    slide_cache.log_report()
+    return pdf_paths, failures
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a pitch deck for every spec in a JSON or CSV manifest.')
+    parser.add_argument('manifest', help='JSON list of deck specs (or {"decks": [...]}) or a CSV with one spec per row')
+    parser.add_argument('--output-dir', default='./decks/', help='Directory for the generated PDFs')
+    parser.add_argument('--charts-dir', default=None,
+                        help='Also write per-deck chart images under this directory (default: charts stay in memory)')
+    parser.add_argument('--quality', choices=sorted(QUALITY_PROFILES), default=None,
+                        help='Chart render profile: draft and screen are fast raster previews, print embeds vector charts')
+    parser.add_argument('--image-dpi', type=int, default=None,
+                        help='Downsample raster charts to this DPI at their placed size (default 150; 0 keeps full resolution)')
+    parser.add_argument('--workers', type=int, default=None, help='Chart rendering processes (default: CPU count)')
+    parser.add_argument('--simulation-workers', type=int, default=None,
+                        help='Processes for chunked Monte Carlo runs (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Monte Carlo paths simulated per chunk (default 100000)')
+    args = parser.parse_args()
+
+    specs = load_manifest(args.manifest)
+    _, failures = generate_decks(specs, args.output_dir, args.charts_dir, args.workers, quality=args.quality,
+                                 image_dpi=args.image_dpi, simulation_workers=args.simulation_workers,
+                                 chunk_size=args.chunk_size)
+    if failures:
+        raise SystemExit(f"{len(failures)} deck(s) failed: {', '.join(sorted(failures))}")
+
+if __name__ == "__main__":
+    main()
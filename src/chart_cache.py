@@ -0,0 +1,115 @@
+import os
+import sys
+import pickle
+import shutil
+import hashlib
+import inspect
+import logging
+import importlib.metadata
+from chart_output import get_quality_profile, profile_filename, save_chart
+
+DEFAULT_CACHE_DIR = os.environ.get('PITCHDECK_CHART_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'pitchdeck', 'charts'))
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_generator_versions = {}
+
+def generator_version(func):
+    # Any edit to the generator's module, including helpers and hard-coded DPI or style, changes the version
+    module_name = func.__module__
+    if module_name not in _generator_versions:
+        source = inspect.getsource(sys.modules[module_name])
+        _generator_versions[module_name] = hashlib.sha256(source.encode('utf-8')).hexdigest()
+    return _generator_versions[module_name]
+
+_render_fingerprint = None
+
+def render_fingerprint():
+    # What shapes every chart besides its generator and quality profile: the matplotlib release and
+    # chart_output's rcParams and savefig handling. Computed once per process without importing matplotlib,
+    # so an all-hit run never loads it. A user matplotlibrc is not tracked; clear the cache after editing one
+    global _render_fingerprint
+    if _render_fingerprint is None:
+        _render_fingerprint = (importlib.metadata.version('matplotlib'), generator_version(save_chart))
+    return _render_fingerprint
+
+class ChartCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = []
+        self.misses = []
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, job, image_path, quality=None):
+        # The output directory (or None for in-memory charts) is not part of a chart's content
+        args = tuple('<image_path>' if arg is image_path or (isinstance(arg, str) and arg == image_path) else arg for arg in job.args)
+        profile = get_quality_profile(quality)
+        payload = pickle.dumps((
+            job.func.__module__, job.func.__qualname__, generator_version(job.func),
+            job.filename, args, profile, render_fingerprint()
+        ), protocol=4)
+        # The key is the entry's file name, with the extension of the format the profile renders
+        return hashlib.sha256(payload).hexdigest() + os.path.splitext(profile_filename(job.filename, profile))[1]
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def fetch(self, job, key):
+        # Returns the cached chart's bytes. The cache directory is shared between processes, so an entry
+        # can be evicted by another run at any moment; failing to read it is a miss
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'rb') as f:
+                chart = f.read()
+            # Touch the entry so eviction treats it as recently used
+            os.utime(entry_path)
+        except OSError:
+            self.misses.append(job.name)
+            return None
+        self.hits.append(job.name)
+        return chart
+
+    def store(self, job, key, chart):
+        # chart is either the rendered file's path or its bytes; a chart that cannot be stored is only a future miss
+        entry_path = self._entry_path(key)
+        temp_path = f'{entry_path}.{os.getpid()}.tmp'
+        try:
+            if isinstance(chart, bytes):
+                with open(temp_path, 'wb') as f:
+                    f.write(chart)
+            else:
+                shutil.copyfile(chart, temp_path)
+            os.replace(temp_path, entry_path)
+            self.evict()
+        except OSError as e:
+            logging.warning(f"Chart '{job.name}' not cached: {str(e)}")
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Already evicted by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_bytes -= size
+
+    def log_report(self):
+        total = len(self.hits) + len(self.misses)
+        hit_rate = len(self.hits) / total if total else 0
+        logging.info(f"Chart cache: {len(self.hits)} hits, {len(self.misses)} misses ({hit_rate:.0%} hit rate)")
+        if self.hits:
+            logging.info(f"Reused cached charts: {', '.join(self.hits)}")
+        if self.misses:
+            logging.info(f"Rendered charts: {', '.join(self.misses)}")
@@ -1,7 +1,8 @@
-import matplotlib.pyplot as plt
+from chart_output import save_chart
 import numpy as np
 
 def generate_competitive_landscape_chart(image_path):
+    import matplotlib.pyplot as plt
     companies = ['Cosmic Life', 'Traditional Insurers', 'Insurtech Startups']
     innovation = [9, 3, 7]
     customer_experience = [9, 4, 8]
@@ -27,10 +28,12 @@ def generate_competitive_landscape_chart(image_path):
 
     fig.tight_layout()
 
-    plt.savefig(f'{image_path}/competitive_landscape_chart.png')
+    chart = save_chart(image_path, 'competitive_landscape_chart.png')
     plt.close()
+    return chart
 
 def generate_optimization_results_chart(image_path, financial_data):
+    import matplotlib.pyplot as plt
     metrics = ['Growth Rate', 'EV/EBITDA Multiple']
     before = [financial_data['initial_growth_rate'], financial_data['initial_ev_ebitda']]
     after = [financial_data['optimized_growth_rate'], financial_data['optimized_ev_ebitda']]
@@ -53,10 +56,12 @@ def generate_optimization_results_chart(image_path, financial_data):
 
     fig.tight_layout()
 
-    plt.savefig(f'{image_path}/optimization_results_chart.png')
+    chart = save_chart(image_path, 'optimization_results_chart.png')
     plt.close()
+    return chart
 
 def generate_competitive_quadrant_chart(image_path):
+    import matplotlib.pyplot as plt
     companies = ['Cosmic Life', 'Traditional Insurer A', 'Traditional Insurer B', 'Insurtech Startup X', 'Insurtech Startup Y']
     x = [0.8, 0.2, 0.3, 0.6, 0.7]  # Technology Innovation
     y = [0.6, 0.8, 0.7, 0.3, 0.2]  # Market Share
@@ -81,5 +86,6 @@ def generate_competitive_quadrant_chart(image_path):
     ax.set_xlim(0, 1)
     ax.set_ylim(0, 1)
 
-    plt.savefig(f'{image_path}/competitive_quadrant_chart.png', dpi=300, bbox_inches='tight')
+    chart = save_chart(image_path, 'competitive_quadrant_chart.png', dpi=300, bbox_inches='tight')
     plt.close()
+    return chart
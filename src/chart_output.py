@@ -0,0 +1,61 @@
+import io
+import os
+
+# Render settings applied to every chart generator. 'pdf' charts are vector and embedded as PDF forms,
+# so DPI only matters for anything rasterized inside them
+QUALITY_PROFILES = {
+    'draft': {'format': 'png', 'dpi': 60, 'plotted_paths': 100, 'simplify_threshold': 1.0, 'compression': 1},
+    'screen': {'format': 'png', 'dpi': 150, 'plotted_paths': 500, 'simplify_threshold': 0.5, 'compression': 6},
+    'print': {'format': 'pdf', 'dpi': 300, 'plotted_paths': 1000, 'simplify_threshold': 0.111111111111, 'compression': 6},
+}
+
+_quality_profile = None
+
+def get_quality_profile(name):
+    # None keeps each generator's own DPI and format
+    if name is not None and name not in QUALITY_PROFILES:
+        raise ValueError(f"Unknown quality profile: {name}")
+    return QUALITY_PROFILES.get(name)
+
+def use_quality_profile(name):
+    # Applied where charts are drawn; matplotlib is only imported then, so analysis-only runs and
+    # all-hit chart cache runs never load it
+    global _quality_profile
+    profile = get_quality_profile(name)
+    import matplotlib
+    _quality_profile = name
+    matplotlib.rcParams['path.simplify_threshold'] = (
+        profile['simplify_threshold'] if profile else matplotlib.rcParamsDefault['path.simplify_threshold'])
+    matplotlib.rcParams['pdf.compression'] = profile['compression'] if profile else matplotlib.rcParamsDefault['pdf.compression']
+
+def quality_profile():
+    return QUALITY_PROFILES.get(_quality_profile)
+
+def profile_filename(filename, profile):
+    return f"{os.path.splitext(filename)[0]}.{profile['format']}" if profile else filename
+
+def chart_filename(filename):
+    return profile_filename(filename, quality_profile())
+
+def save_chart(image_path, filename, **savefig_kwargs):
+    import matplotlib.pyplot as plt
+    filename = chart_filename(filename)
+    savefig_kwargs['format'] = os.path.splitext(filename)[1][1:]
+    profile = quality_profile()
+    if profile:
+        savefig_kwargs['dpi'] = profile['dpi']
+    if savefig_kwargs['format'] == 'png':
+        savefig_kwargs['pil_kwargs'] = {'compress_level': profile['compression'] if profile else 6}
+    else:
+        # Without a creation date identical charts produce identical bytes
+        savefig_kwargs['metadata'] = {'CreationDate': None}
+
+    # Without an image directory the chart never touches the filesystem and is returned as bytes
+    if image_path is None:
+        buffer = io.BytesIO()
+        plt.savefig(buffer, **savefig_kwargs)
+        return buffer.getvalue()
+
+    chart_path = os.path.join(image_path, filename)
+    plt.savefig(chart_path, **savefig_kwargs)
+    return chart_path
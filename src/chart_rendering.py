@@ -0,0 +1,84 @@
+import os
+import time
+import logging
+from chart_output import get_quality_profile, profile_filename, use_quality_profile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# A chart generator call together with the file it writes inside the image directory
+ChartJob = namedtuple('ChartJob', ['name', 'func', 'args', 'filename'])
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+def create_chart_executor(max_workers=None):
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker)
+
+def _render_chart(job, quality=None):
+    # Workers are shared between runs, so the profile is applied per job
+    use_quality_profile(quality)
+    start = time.perf_counter()
+    chart = job.func(*job.args)
+    # Generators return their chart path or PNG bytes; the Monte Carlo chart returns it last, after its statistics
+    if isinstance(chart, tuple):
+        chart = chart[-1]
+    return chart, time.perf_counter() - start
+
+def render_charts(jobs, image_path, max_workers=None, cache=None, executor=None, quality=None):
+    # With image_path set to None charts are kept in memory as bytes instead of written to disk. The profile is
+    # only applied to matplotlib where a chart is drawn, in _render_chart
+    profile = get_quality_profile(quality)
+    charts = {}
+    failures = {}
+
+    # Cache hits are reused without touching matplotlib
+    cache_keys = {}
+    if cache is not None:
+        pending = []
+        for job in jobs:
+            key = cache.key(job, image_path, quality)
+            chart = cache.fetch(job, key)
+            if chart is None:
+                cache_keys[job.name] = key
+                pending.append(job)
+            elif image_path is None:
+                charts[job.name] = chart
+            else:
+                charts[job.name] = os.path.join(image_path, profile_filename(job.filename, profile))
+                with open(charts[job.name], 'wb') as f:
+                    f.write(chart)
+        jobs = pending
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(jobs)) if jobs else 1
+
+    def record(job, run):
+        try:
+            chart, elapsed = run()
+        except Exception as e:
+            failures[job.name] = e
+            logging.error(f"Chart '{job.name}' failed: {str(e)}")
+        else:
+            charts[job.name] = chart
+            logging.info(f"Chart '{job.name}' rendered in {elapsed:.2f}s")
+            if job.name in cache_keys:
+                cache.store(job, cache_keys[job.name], chart)
+
+    if executor is None and max_workers == 1:
+        for job in jobs:
+            record(job, lambda: _render_chart(job, quality))
+    elif jobs:
+        # A caller-supplied executor is long-lived, e.g. shared by every deck of a batch
+        owns_executor = executor is None
+        executor = executor or create_chart_executor(max_workers)
+        try:
+            futures = {executor.submit(_render_chart, job, quality): job for job in jobs}
+            for future in as_completed(futures):
+                record(futures[future], future.result)
+        finally:
+            if owns_executor:
+                executor.shutdown()
+
+    if failures:
+        raise RuntimeError(f"Failed to render charts: {', '.join(sorted(failures))}")
+    return charts
@@ -1,13 +1,22 @@
-import numpy as np
+import os
 from tam_sam_som import generate_tam_sam_som_data, generate_tam_sam_som_chart
+from monte_carlo import DEFAULT_BLOCK_SIZE, run_monte_carlo_simulation, run_streaming_monte_carlo_simulation, generate_monte_carlo_chart
 from financial_projections import generate_financial_projections_chart
-from monte_carlo import generate_monte_carlo_chart
 from stress_test import generate_stress_testing_chart
-from gradient_descent_optimization import generate_optimization_results_chart
+from gradient_descent_optimization import run_optimization
+from chart_generation import generate_competitive_landscape_chart, generate_optimization_results_chart, generate_competitive_quadrant_chart
 from milestones import generate_milestones_chart
 from backtesting import generate_backtesting_chart
 from scenario_analysis import generate_scenario_analysis_chart
 from sensitivity_analysis import generate_sensitivity_analysis_chart
+from chart_rendering import ChartJob, render_charts
+from pipeline import Stage, Pipeline
+from projection_engine import project_batch
+from scenario_engine import run_scenario_grid
+from backtest_engine import load_actuals, simulated_actuals, run_backtest
+from stress_engine import run_stress_tests, reverse_stress_test
+from sensitivity_engine import run_tornado_analysis, swing, run_sobol_analysis
+from financial_data import FinancialData
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -17,59 +26,77 @@ def validate_input(data, expected_keys):
         if key not in data:
             raise ValueError(f"Missing required key: {key}")
 
-def generate_financial_data(tam_sam_som_data):
-    financial_data = {}
+DEFAULT_GROWTH_RATES = [1.5, 1.4, 1.3, 1.25, 1.2] + [1.15] * 5 + [1.1] * 4  # 14 rates for 15 years
+DEFAULT_NUM_SIMULATIONS = 1000
+
+# Deck spec keys that change the analysis rather than the deck text
+ASSUMPTION_KEYS = ('tam', 'sam_share', 'som_share', 'som', 'growth_rates', 'ebitda_margin', 'discount_rate', 'history',
+                   'num_simulations')
+
+def generate_financial_data(tam_sam_som_data, growth_rates=None, ebitda_margin=0.15, discount_rate=0.12):
+    financial_data = FinancialData()
     years = range(1, 16)  # 15-year projection
-    financial_data['years'] = list(years)
+    financial_data['years'] = years
     
     initial_som = tam_sam_som_data['SOM']
-    growth_rates = [1.5, 1.4, 1.3, 1.25, 1.2] + [1.15] * 5 + [1.1] * 4  # 14 rates for 15 years
+    growth_rates = list(growth_rates or DEFAULT_GROWTH_RATES)
+    if len(growth_rates) != len(years) - 1:
+        raise ValueError(f"Expected {len(years) - 1} growth rates for a {len(years)}-year projection, got {len(growth_rates)}")
     
-    revenue_projections = [initial_som]
-    for rate in growth_rates:
-        revenue_projections.append(revenue_projections[-1] * rate)
-    
-    financial_data['revenue_projections'] = revenue_projections
-    financial_data['ebitda_projections'] = [revenue * 0.15 for revenue in revenue_projections]
-    financial_data['npv_projections'] = [revenue / (1.12 ** year) for year, revenue in enumerate(revenue_projections, start=1)]
-    financial_data['dcf_projections'] = [ebitda / (1.12 ** year) for year, ebitda in enumerate(financial_data['ebitda_projections'], start=1)]
-
+    # A batch of one; project_batch evaluates any number of assumption sets the same way
+    projections = project_batch(initial_som, [growth_rates], ebitda_margin, discount_rate)
+    for key in ('revenue_projections', 'ebitda_projections', 'npv_projections', 'dcf_projections'):
+        financial_data[key] = projections[key][0]
     financial_data['growth_rates'] = growth_rates
-
-    initial_value = financial_data['revenue_projections'][0]
-    final_value = financial_data['revenue_projections'][-1]
-    num_years = len(financial_data['years']) - 1
-    financial_data['cagr'] = (final_value / initial_value) ** (1 / num_years) - 1
+    financial_data['cagr'] = projections['cagr'][0]
 
     financial_data['ev_multiples'] = [4, 5, 6, 7, 8]  # Conservative EV/EBITDA multiples
 
     return financial_data
 
+def generate_market_data(assumptions):
+    market_keys = ('tam', 'sam_share', 'som_share')
+    tam_sam_som_data = generate_tam_sam_som_data(**{key: assumptions[key] for key in market_keys if key in assumptions})
+    if 'som' in assumptions:
+        tam_sam_som_data['SOM'] = assumptions['som']
+    return tam_sam_som_data
+
+def generate_projections(tam_sam_som_data, assumptions):
+    projection_keys = ('growth_rates', 'ebitda_margin', 'discount_rate')
+    return generate_financial_data(tam_sam_som_data, **{key: assumptions[key] for key in projection_keys if key in assumptions})
+
+def generate_monte_carlo_results(financial_data, assumptions, num_workers=None, chunk_size=None, seed=0):
+    num_simulations = int(assumptions.get('num_simulations', DEFAULT_NUM_SIMULATIONS))
+    chunk_size = chunk_size or DEFAULT_BLOCK_SIZE
+    # A run that fits in one chunk keeps every path for the chart; larger runs stream per-chunk statistics
+    # across num_workers processes (all cores by default) and keep a sample of paths
+    if num_simulations <= chunk_size:
+        return run_monte_carlo_simulation(financial_data, num_simulations, seed=seed)
+    return run_streaming_monte_carlo_simulation(financial_data, num_simulations, seed=seed, chunk_size=chunk_size,
+                                                num_workers=num_workers)
+
 def generate_stress_test_data(financial_data):
-    revenues = financial_data['revenue_projections']
-    return {
-        'scenarios': ['Economic Downturn', 'Regulatory Changes', 'Increased Competition'],
-        'impacts': [-0.2 * revenues[-1], -0.15 * revenues[-1], -0.1 * revenues[-1]],
-        'stress_tests': ['Economic Downturn', 'Regulatory Changes', 'Increased Competition']
-    }
+    years, revenues, ebitda = financial_data['years'], financial_data['revenue_projections'], financial_data['ebitda_projections']
+    stress_test_data = run_stress_tests(years, revenues, ebitda)
 
-def generate_scenario_data(financial_data):
-    base_revenue = financial_data['revenue_projections'][-1]
-    base_cost = base_revenue * 0.7  # Assuming 70% cost
-    base_profit = base_revenue * 0.3  # Assuming 30% profit
-    return {
-        'scenarios': ['Best Case', 'Base Case', 'Worst Case'],
-        'revenues': [base_revenue * 1.5, base_revenue, base_revenue * 0.7],
-        'costs': [base_cost * 0.8, base_cost, base_cost * 1.2],
-        'profits': [base_profit * 2, base_profit, base_profit * 0.4]
-    }
+    # Reverse stress test: how deep each shock path must be before EBITDA or cumulative cash turns negative
+    profiles = stress_test_data['profiles']
+    stress_test_data['breaking_depth_ebitda'] = reverse_stress_test(revenues, ebitda, profiles, [0.0])[:, 0].tolist()
+    stress_test_data['breaking_depth_cash'] = reverse_stress_test(revenues, ebitda, profiles, [0.0], metric='cash')[:, 0].tolist()
+    return stress_test_data
 
-def generate_sensitivity_data(financial_data):
-    return {
-        'parameters': ['Customer Acquisition Cost', 'Churn Rate', 'Conversion Rate', 'Pricing'],
-        'base_values': [200, 0.1, 0.05, 1.0],
-        'sensitivities': [0.2, 0.05, 0.02, 0.1]
-    }
+def generate_scenario_data(tam_sam_som_data, assumptions, scenario_dir=None):
+    # Streams the full scenario grid; only summaries and the best, base and worst cases come back
+    return run_scenario_grid(tam_sam_som_data['SOM'], list(assumptions.get('growth_rates') or DEFAULT_GROWTH_RATES),
+                             output_dir=scenario_dir)
+
+def generate_sensitivity_data(tam_sam_som_data, assumptions):
+    return run_tornado_analysis(tam_sam_som_data['SOM'], list(assumptions.get('growth_rates') or DEFAULT_GROWTH_RATES),
+                                assumptions.get('ebitda_margin', 0.15), assumptions.get('discount_rate', 0.12))
+
+def generate_global_sensitivity_data(tam_sam_som_data, assumptions, num_workers=None):
+    return run_sobol_analysis(tam_sam_som_data['SOM'], list(assumptions.get('growth_rates') or DEFAULT_GROWTH_RATES),
+                              num_workers=num_workers)
 
 def generate_milestones_data():
     return {
@@ -77,18 +104,27 @@ def generate_milestones_data():
         'milestone_years': [1, 2, 3, 5, 7]
     }
 
-def generate_backtesting_data(financial_data):
-    actual_values = financial_data['revenue_projections']
-    forecasted_values = [val * 1.1 for val in actual_values]  # Slightly overestimate for forecasted values
+def generate_backtesting_data(financial_data, assumptions):
+    # Rolling-origin backtest of the compound-growth model on the supplied history, or on a seeded
+    # simulated history when there is none
+    if assumptions.get('history'):
+        periods, actual_values = load_actuals(assumptions['history'])
+        source = 'historical data'
+    else:
+        periods, actual_values = simulated_actuals(financial_data['revenue_projections'][0])
+        source = 'a simulated revenue history'
+    backtest_data, forecasted_values = run_backtest(periods, actual_values, source)
     return {
         'actual_values': actual_values,
-        'forecasted_values': forecasted_values
+        'forecasted_values': forecasted_values,
+        'backtest_data': backtest_data
     }
 
 def calculate_sensitivity_metrics(financial_data):
-    financial_data['cac_sensitivity'] = 0.15  # 15% EBITDA impact for 10% CAC change
-    financial_data['retention_sensitivity'] = 0.10  # 10% revenue impact for 5% retention rate change
-    financial_data['pricing_sensitivity'] = 0.20  # 20% NPV impact for 5% pricing change
+    sensitivity_data = financial_data['sensitivity_data']
+    financial_data['cac_sensitivity'] = swing(sensitivity_data, 'Customer Acquisition Cost', 'ebitda')
+    financial_data['retention_sensitivity'] = swing(sensitivity_data, 'Retention Rate', 'revenue')
+    financial_data['pricing_sensitivity'] = swing(sensitivity_data, 'Pricing', 'npv')
 
 def calculate_optimization_results(financial_data):
     financial_data['initial_growth_rate'] = 0.50  # 50% initial growth rate
@@ -97,87 +133,125 @@ def calculate_optimization_results(financial_data):
     financial_data['optimized_ev_ebitda'] = max(8, min(20, financial_data['initial_ev_ebitda'] * 1.2))  # Ensure it's within 8x-20x range
     financial_data['optimization_improvement'] = (financial_data['optimized_growth_rate'] - financial_data['initial_growth_rate']) / financial_data['initial_growth_rate']
 
-def perform_detailed_risk_analysis(financial_data):
-    risk_factors = {
-        'Market Risk': np.random.normal(0.05, 0.02),
-        'Competition Risk': np.random.normal(0.04, 0.015),
-        'Regulatory Risk': np.random.normal(0.03, 0.01),
-        'Operational Risk': np.random.normal(0.035, 0.015),
-        'Technology Risk': np.random.normal(0.025, 0.01)
-    }
-    
-    total_risk = sum(risk_factors.values())
-    impact_on_revenue = total_risk * financial_data['revenue_projections'][-1]
-    impact_on_ebitda = total_risk * financial_data['ebitda_projections'][-1]
-    
-    risk_mitigation_strategies = {
-        'Market Risk': "Diversify product offerings and expand into new markets",
-        'Competition Risk': "Invest in R&D and maintain a strong focus on customer experience",
-        'Regulatory Risk': "Maintain compliance team and actively engage with regulators",
-        'Operational Risk': "Implement robust processes and invest in employee training",
-        'Technology Risk': "Continuous technology upgrades and strong cybersecurity measures"
-    }
-    
-    return {
-        'risk_factors': risk_factors,
-        'total_risk': total_risk,
-        'impact_on_revenue': impact_on_revenue,
-        'impact_on_ebitda': impact_on_ebitda,
-        'risk_mitigation_strategies': risk_mitigation_strategies
-    }
+def run_growth_optimization():
+    optimization_data = {}
+    calculate_optimization_results(optimization_data)
+    run_optimization(optimization_data)
 
-def run_financial_analysis(image_path):
-    try:
-        tam_sam_som_data = generate_tam_sam_som_data()
-        generate_tam_sam_som_chart(tam_sam_som_data, image_path)
+    # Adjust EBITDA multiple to be within 8x-20x range
+    optimization_data['initial_ev_ebitda'] = max(8, min(20, optimization_data['initial_ev_ebitda']))
+    optimization_data['optimized_ev_ebitda'] = max(8, min(20, optimization_data['optimized_ev_ebitda']))
+    return optimization_data
 
-        financial_data = generate_financial_data(tam_sam_som_data)
-        generate_financial_projections_chart(image_path, financial_data)
-        generate_monte_carlo_chart(image_path, financial_data)
+def assemble_financial_data(projections, monte_carlo_results, stress_test_data, optimization_data, scenario_data,
+                            sensitivity_data, milestones_data, backtesting_data):
+    financial_data = projections.copy()
+    financial_data['unicorn_probability'] = monte_carlo_results['unicorn_probability']
+    financial_data['avg_unicorn_year'] = monte_carlo_results['avg_unicorn_year']
+    financial_data['mean_first_passage_year'] = monte_carlo_results['mean_first_passage_year']
+    financial_data['first_passage'] = monte_carlo_results['first_passage']
+    financial_data['stress_test_data'] = stress_test_data
+    financial_data.update(optimization_data)
+    financial_data['scenario_data'] = scenario_data
+    financial_data['sensitivity_data'] = sensitivity_data
+    financial_data.update(milestones_data)
+    financial_data.update(backtesting_data)
+    calculate_sensitivity_metrics(financial_data)
+    return financial_data
 
-        financial_data['stress_test_data'] = generate_stress_test_data(financial_data)
-        generate_stress_testing_chart(image_path, financial_data)
+def render_analysis_charts(image_path, tam_sam_som_data, financial_data, monte_carlo_results, max_workers=None, chart_cache=None,
+                           executor=None, quality=None):
+    # Each generator gets only the financial_data fields it reads, so the chart cache key changes with those alone
+    def fields(*keys):
+        return financial_data.select(keys)
 
-        calculate_optimization_results(financial_data)  # Move this line here
-        generate_optimization_results_chart(image_path, financial_data)
+    # Every chart is declared once; all of them render in parallel once their inputs are ready
+    return render_charts([
+        ChartJob('tam_sam_som', generate_tam_sam_som_chart, (tam_sam_som_data, image_path), 'tam_sam_som_chart.png'),
+        ChartJob('financial_projections', generate_financial_projections_chart,
+                 (image_path, fields('years', 'revenue_projections', 'ebitda_projections', 'npv_projections', 'dcf_projections')),
+                 'financial_projections_chart.png'),
+        ChartJob('monte_carlo', generate_monte_carlo_chart, (image_path, fields(), monte_carlo_results), 'monte_carlo_chart.png'),
+        ChartJob('stress_testing', generate_stress_testing_chart, (image_path, fields('years', 'ebitda_projections', 'stress_test_data')),
+                 'stress_testing_chart.png'),
+        ChartJob('optimization_results', generate_optimization_results_chart,
+                 (image_path, fields('initial_growth_rate', 'initial_ev_ebitda', 'optimized_growth_rate', 'optimized_ev_ebitda')),
+                 'optimization_results_chart.png'),
+        ChartJob('scenario_analysis', generate_scenario_analysis_chart, (image_path, fields('scenario_data')), 'scenario_analysis_chart.png'),
+        ChartJob('sensitivity_analysis', generate_sensitivity_analysis_chart, (image_path, fields('sensitivity_data')), 'sensitivity_analysis_chart.png'),
+        ChartJob('milestones', generate_milestones_chart, (image_path, fields('milestones', 'milestone_years')), 'milestones_chart.png'),
+        ChartJob('backtesting', generate_backtesting_chart, (image_path, fields('actual_values', 'forecasted_values', 'backtest_data')),
+                 'backtesting_chart.png'),
+        ChartJob('competitive_landscape', generate_competitive_landscape_chart, (image_path,), 'competitive_landscape_chart.png'),
+        ChartJob('competitive_quadrant', generate_competitive_quadrant_chart, (image_path,), 'competitive_quadrant_chart.png'),
+    ], image_path, max_workers, chart_cache, executor, quality)
 
-        financial_data['scenario_data'] = generate_scenario_data(financial_data)
-        generate_scenario_analysis_chart(image_path, financial_data)
+def build_analysis_stages(max_workers=None, chart_cache=None, executor=None, quality=None, scenario_dir=None,
+                          simulation_workers=None, chunk_size=None):
+    def render(image_path, tam_sam_som_data, financial_data, monte_carlo_results):
+        if image_path is not None:
+            os.makedirs(image_path, exist_ok=True)
+        return render_analysis_charts(image_path, tam_sam_som_data, financial_data, monte_carlo_results, max_workers, chart_cache,
+                                      executor, quality)
 
-        financial_data['sensitivity_data'] = generate_sensitivity_data(financial_data)
-        generate_sensitivity_analysis_chart(image_path, financial_data)
+    def monte_carlo(projections, assumptions):
+        return generate_monte_carlo_results(projections, assumptions, simulation_workers, chunk_size)
 
-        financial_data.update(generate_milestones_data())
-        generate_milestones_chart(image_path, financial_data)
+    def scenarios(tam_sam_som_data, assumptions):
+        return generate_scenario_data(tam_sam_som_data, assumptions, scenario_dir)
 
-        financial_data.update(generate_backtesting_data(financial_data))
-        generate_backtesting_chart(image_path, financial_data)
+    def global_sensitivity(tam_sam_som_data, assumptions):
+        return generate_global_sensitivity_data(tam_sam_som_data, assumptions, max_workers)
 
-        calculate_sensitivity_metrics(financial_data)
+    return [
+        Stage('tam_sam_som', generate_market_data, ('assumptions',), ('tam_sam_som_data',)),
+        Stage('projections', generate_projections, ('tam_sam_som_data', 'assumptions'), ('projections',)),
+        Stage('monte_carlo', monte_carlo, ('projections', 'assumptions'), ('monte_carlo_results',)),
+        Stage('stress_test', generate_stress_test_data, ('projections',), ('stress_test_data',)),
+        Stage('optimization', run_growth_optimization, (), ('optimization_data',)),
+        Stage('scenarios', scenarios, ('tam_sam_som_data', 'assumptions'), ('scenario_data',)),
+        Stage('sensitivity', generate_sensitivity_data, ('tam_sam_som_data', 'assumptions'), ('sensitivity_data',)),
+        # Only runs when 'global_sensitivity' is requested; it takes N x (k + 2) model runs
+        Stage('global_sensitivity', global_sensitivity, ('tam_sam_som_data', 'assumptions'), ('global_sensitivity',)),
+        Stage('milestones', generate_milestones_data, (), ('milestones_data',)),
+        Stage('backtesting', generate_backtesting_data, ('projections', 'assumptions'), ('backtesting_data',)),
+        Stage('financial_data', assemble_financial_data,
+              ('projections', 'monte_carlo_results', 'stress_test_data', 'optimization_data', 'scenario_data',
+               'sensitivity_data', 'milestones_data', 'backtesting_data'),
+              ('financial_data',)),
+        Stage('charts', render, ('image_path', 'tam_sam_som_data', 'financial_data', 'monte_carlo_results'), ('charts',)),
+    ]
 
-        print("\nFinancial Projections:")
-        print(f"• Year 5 Projections:")
-        print(f"  - EBITDA: ${financial_data['ebitda_projections'][4]:,.2f}")
-        print(f"  - Revenue: ${financial_data['revenue_projections'][4]:,.2f}")
-        print(f"  - NPV: ${financial_data['npv_projections'][4]:,.2f}")
-        print(f"  - Discounted Cash Flow: ${financial_data['dcf_projections'][4]:,.2f}")
-        print(f"• 5-Year CAGR: {((financial_data['revenue_projections'][4] / financial_data['revenue_projections'][0]) ** (1/5) - 1) * 100:.2f}%")
+def print_financial_summary(financial_data):
+    print("\nFinancial Projections:")
+    print(f"• Year 5 Projections:")
+    print(f"  - EBITDA: ${financial_data['ebitda_projections'][4]:,.2f}")
+    print(f"  - Revenue: ${financial_data['revenue_projections'][4]:,.2f}")
+    print(f"  - NPV: ${financial_data['npv_projections'][4]:,.2f}")
+    print(f"  - Discounted Cash Flow: ${financial_data['dcf_projections'][4]:,.2f}")
+    print(f"• 5-Year CAGR: {((financial_data['revenue_projections'][4] / financial_data['revenue_projections'][0]) ** (1/5) - 1) * 100:.2f}%")
 
-        print(f"\n• Year 10 Projections:")
-        print(f"  - EBITDA: ${financial_data['ebitda_projections'][9]:,.2f}")
-        print(f"  - Revenue: ${financial_data['revenue_projections'][9]:,.2f}")
-        print(f"  - NPV: ${financial_data['npv_projections'][9]:,.2f}")
-        print(f"  - Discounted Cash Flow: ${financial_data['dcf_projections'][9]:,.2f}")
-        print(f"• 10-Year CAGR: {((financial_data['revenue_projections'][9] / financial_data['revenue_projections'][0]) ** (1/10) - 1) * 100:.2f}%")
+    print(f"\n• Year 10 Projections:")
+    print(f"  - EBITDA: ${financial_data['ebitda_projections'][9]:,.2f}")
+    print(f"  - Revenue: ${financial_data['revenue_projections'][9]:,.2f}")
+    print(f"  - NPV: ${financial_data['npv_projections'][9]:,.2f}")
+    print(f"  - Discounted Cash Flow: ${financial_data['dcf_projections'][9]:,.2f}")
+    print(f"• 10-Year CAGR: {((financial_data['revenue_projections'][9] / financial_data['revenue_projections'][0]) ** (1/10) - 1) * 100:.2f}%")
 
-        print(f"\n• Year 15 Projections:")
-        print(f"  - EBITDA: ${financial_data['ebitda_projections'][14]:,.2f}")
-        print(f"  - Revenue: ${financial_data['revenue_projections'][14]:,.2f}")
-        print(f"  - NPV: ${financial_data['npv_projections'][14]:,.2f}")
-        print(f"  - Discounted Cash Flow: ${financial_data['dcf_projections'][14]:,.2f}")
-        print(f"• 15-Year CAGR: {financial_data['cagr'] * 100:.2f}%")
+    print(f"\n• Year 15 Projections:")
+    print(f"  - EBITDA: ${financial_data['ebitda_projections'][14]:,.2f}")
+    print(f"  - Revenue: ${financial_data['revenue_projections'][14]:,.2f}")
+    print(f"  - NPV: ${financial_data['npv_projections'][14]:,.2f}")
+    print(f"  - Discounted Cash Flow: ${financial_data['dcf_projections'][14]:,.2f}")
+    print(f"• 15-Year CAGR: {financial_data['cagr'] * 100:.2f}%")
 
-        return tam_sam_som_data, financial_data
+def run_financial_analysis(image_path, max_workers=None, chart_cache=None, assumptions=None, quality=None):
+    try:
+        pipeline = Pipeline(build_analysis_stages(max_workers, chart_cache, quality=quality),
+                            inputs={'image_path': image_path, 'assumptions': assumptions or {}})
+        results = pipeline.run(['tam_sam_som_data', 'financial_data', 'charts'])
+        print_financial_summary(results['financial_data'])
+        return results['tam_sam_som_data'], results['financial_data']
     except Exception as e:
         logging.error(f"Error in run_financial_analysis: {str(e)}")
         raise
@@ -0,0 +1,145 @@
+import json
+import math
+import numpy as np
+from collections.abc import MutableMapping
+
+# Every field financial_data can hold. 'series' fields are float64 arrays, 'year_series' fields are
+# indexed by projection year (so they can be windowed), 'value' fields are scalars and 'table'
+# fields hold nested dicts or lists of labels
+FIELDS = {
+    'years': 'year_series',
+    'revenue_projections': 'year_series',
+    'ebitda_projections': 'year_series',
+    'npv_projections': 'year_series',
+    'dcf_projections': 'year_series',
+    'growth_rates': 'series',
+    'ev_multiples': 'series',
+    'milestone_years': 'series',
+    'actual_values': 'series',
+    'forecasted_values': 'series',
+    'cagr': 'value',
+    'unicorn_probability': 'value',
+    'avg_unicorn_year': 'value',
+    'mean_first_passage_year': 'value',
+    'initial_growth_rate': 'value',
+    'optimized_growth_rate': 'value',
+    'initial_ev_ebitda': 'value',
+    'optimized_ev_ebitda': 'value',
+    'optimization_improvement': 'value',
+    'optimization_starts': 'value',
+    'optimization_iterations': 'value',
+    'optimization_converged': 'value',
+    'cac_sensitivity': 'value',
+    'retention_sensitivity': 'value',
+    'pricing_sensitivity': 'value',
+    'milestones': 'table',
+    'stress_test_data': 'table',
+    'scenario_data': 'table',
+    'sensitivity_data': 'table',
+    'backtest_data': 'table',
+    'first_passage': 'table',
+}
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _json_value(value):
+    # Plain JSON types, with NaN (e.g. a year no path reached) as null so any JSON parser accepts the output
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    elif isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, dict):
+        return {key: _json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(item) for item in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+class FinancialData(MutableMapping):
+    # Fixed slots instead of a growing dict; the dict-style accessors keep financial_data['revenue_projections']
+    # and financial_data.update(...) working for every stage and chart
+    __slots__ = tuple(FIELDS)
+
+    def __init__(self, values=None, **kwargs):
+        self.update(values or {}, **kwargs)
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key not in FIELDS:
+            raise KeyError(f"Unknown financial_data field: {key}")
+        if FIELDS[key] in ('series', 'year_series'):
+            value = np.ascontiguousarray(value, dtype=np.float64)
+        elif FIELDS[key] == 'value':
+            value = float(value)
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        return (key for key in FIELDS if hasattr(self, key))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"FinancialData({', '.join(self)})"
+
+    def copy(self):
+        # Shallow: arrays and tables are shared until a stage replaces them
+        copied = FinancialData()
+        for key in self:
+            setattr(copied, key, getattr(self, key))
+        return copied
+
+    def select(self, keys):
+        # Only the given fields, e.g. the ones a chart reads, so its cache key ignores every other field
+        selected = FinancialData()
+        for key in keys:
+            setattr(selected, key, self[key])
+        return selected
+
+    def year_range(self, first_year, last_year):
+        # Year-indexed series become views into this container's arrays; nothing is copied
+        window = self.copy()
+        start = int(np.searchsorted(self.years, first_year))
+        stop = int(np.searchsorted(self.years, last_year, side='right'))
+        for key in self:
+            if FIELDS[key] == 'year_series':
+                setattr(window, key, getattr(self, key)[start:stop])
+        if 'growth_rates' in self:
+            window.growth_rates = self.growth_rates[start:max(start, stop - 1)]
+        return window
+
+    def to_json(self, **kwargs):
+        return json.dumps(_json_value({key: getattr(self, key) for key in self}), allow_nan=False, **kwargs)
+
+    def save_npz(self, path):
+        arrays = {key: getattr(self, key) for key in self if FIELDS[key] in ('series', 'year_series')}
+        others = {key: getattr(self, key) for key in self if FIELDS[key] not in ('series', 'year_series')}
+        np.savez(path, __fields__=np.array(json.dumps(others, default=_json_default)), **arrays)
+
+    @classmethod
+    def load_npz(cls, path):
+        with np.load(path, allow_pickle=False) as npz:
+            financial_data = cls(json.loads(str(npz['__fields__'])))
+            for key in npz.files:
+                if key != '__fields__':
+                    financial_data[key] = npz[key]
+        return financial_data
@@ -1,8 +1,9 @@
 import os
 import numpy as np
-import matplotlib.pyplot as plt
+from chart_output import save_chart
 
 def generate_financial_projections_chart(image_path, financial_data, chart_style=None):
+    import matplotlib.pyplot as plt
     years = financial_data['years']
     ebitda_projections = financial_data['ebitda_projections']
     revenue_projections = financial_data['revenue_projections']
@@ -27,7 +28,8 @@ def generate_financial_projections_chart(image_path, financial_data, chart_style
     plt.grid(True, linestyle='--', alpha=0.7)
     plt.tight_layout()
     
-    chart_path = os.path.join(image_path, 'financial_projections_chart.png')
-    plt.savefig(chart_path, dpi=300)
+    chart = save_chart(image_path, 'financial_projections_chart.png', dpi=300)
     plt.close()
-    print(f"Financial Projections chart saved at {chart_path}")
\ No newline at end of file
+    if image_path is not None:
+        print(f"Financial Projections chart saved at {chart}")
+    return chart
\ No newline at end of file
@@ -1,4 +1,3 @@
-import matplotlib.pyplot as plt
 import numpy as np
 
 def objective_function(growth_rate, ev_multiple):
@@ -6,71 +5,92 @@ def objective_function(growth_rate, ev_multiple):
     # You can modify this to better reflect your specific business metrics
     return growth_rate * ev_multiple - 0.5 * (growth_rate**2 + ev_multiple**2)
 
-def sgd_with_momentum(initial_growth_rate, initial_ev_multiple, learning_rate, momentum, num_iterations):
-    growth_rate = initial_growth_rate
-    ev_multiple = initial_ev_multiple
-    velocity_growth = 0
-    velocity_ev = 0
-    history = []
+# Box the optimizer searches in: growth rate up to 200% and an EV/EBITDA multiple between 8x and 20x
+GROWTH_RATE_BOUNDS = (0.0, 2.0)
+EV_MULTIPLE_BOUNDS = (8.0, 20.0)
+NUM_STARTS = 256
+MAX_ITERATIONS = 500
+MAX_LINE_SEARCH_STEPS = 30
 
-    for _ in range(num_iterations):
-        # Calculate gradients
-        grad_growth = ev_multiple - growth_rate
-        grad_ev = growth_rate - ev_multiple
+def objective_gradient(growth_rate, ev_multiple):
+    return np.stack([ev_multiple - growth_rate, growth_rate - ev_multiple], axis=-1)
 
-        # Update velocities
-        velocity_growth = momentum * velocity_growth + learning_rate * grad_growth
-        velocity_ev = momentum * velocity_ev + learning_rate * grad_ev
+def _project(points):
+    return np.clip(points, [GROWTH_RATE_BOUNDS[0], EV_MULTIPLE_BOUNDS[0]], [GROWTH_RATE_BOUNDS[1], EV_MULTIPLE_BOUNDS[1]])
 
-        # Update parameters
-        growth_rate += velocity_growth
-        ev_multiple += velocity_ev
+def backtracking_line_search(points, gradients, values, alpha=0.5, beta=0.8, max_steps=MAX_LINE_SEARCH_STEPS):
+    # Armijo condition for every start at once on the projected step; a start that never satisfies it
+    # within max_steps keeps its point
+    steps = np.ones(len(points))
+    accepted = np.zeros(len(points), dtype=bool)
+    candidates = points
+    for _ in range(max_steps):
+        trial = _project(points + steps[:, np.newaxis] * gradients)
+        sufficient = objective_function(trial[:, 0], trial[:, 1]) >= values + alpha * np.sum(gradients * (trial - points), axis=1)
+        newly_accepted = sufficient & ~accepted
+        candidates = np.where(newly_accepted[:, np.newaxis], trial, candidates)
+        accepted |= sufficient
+        if accepted.all():
+            break
+        steps = np.where(accepted, steps, steps * beta)
+    return candidates, accepted
 
-        # Store current state
-        history.append((growth_rate, ev_multiple, objective_function(growth_rate, ev_multiple)))
+def multi_start_gradient_ascent(starts, grad_tolerance=1e-8, objective_tolerance=1e-12, max_iterations=MAX_ITERATIONS):
+    # Projected gradient ascent advanced for every start as one array. A start stops once its projected
+    # gradient or its objective change falls below tolerance, or its line search finds no ascent
+    points = _project(np.asarray(starts, dtype=np.float64))
+    values = objective_function(points[:, 0], points[:, 1])
+    active = np.ones(len(points), dtype=bool)
+    converged = np.zeros(len(points), dtype=bool)
+    iterations = np.zeros(len(points), dtype=np.int64)
+    paths = [points.copy()]
 
-    return history
+    for _ in range(max_iterations):
+        index = np.flatnonzero(active)
+        if not len(index):
+            break
+        gradients = objective_gradient(points[index, 0], points[index, 1])
+        projected = _project(points[index] + gradients) - points[index]
+        stationary = np.linalg.norm(projected, axis=1) < grad_tolerance
 
-def backtracking_line_search(growth_rate, ev_multiple, direction, alpha=0.5, beta=0.8):
-    t = 1.0
-    while objective_function(growth_rate + t * direction[0], ev_multiple + t * direction[1]) < \
-          objective_function(growth_rate, ev_multiple) + alpha * t * np.dot(direction, [ev_multiple - growth_rate, growth_rate - ev_multiple]):
-        t *= beta
-    return t
+        candidates, accepted = backtracking_line_search(points[index], gradients, values[index])
+        new_values = objective_function(candidates[:, 0], candidates[:, 1])
+        flat = np.abs(new_values - values[index]) <= objective_tolerance * (1 + np.abs(values[index]))
 
-def generate_optimization_results_chart(image_path, financial_data):
-    initial_growth_rate = financial_data['initial_growth_rate']
-    initial_ev_multiple = financial_data['initial_ev_ebitda']
-    
-    # Run SGD with momentum
-    history = sgd_with_momentum(initial_growth_rate, initial_ev_multiple, learning_rate=0.01, momentum=0.9, num_iterations=100)
-
-    # Extract results
-    growth_rates, ev_multiples, objective_values = zip(*history)
+        points[index] = candidates
+        values[index] = new_values
+        iterations[index] += 1
+        done = stationary | flat | ~accepted
+        converged[index] = stationary | flat
+        active[index[done]] = False
+        paths.append(points.copy())
 
-    # Plot results
-    plt.figure(figsize=(12, 8))
-    plt.subplot(2, 1, 1)
-    plt.plot(growth_rates, ev_multiples, marker='o', linestyle='-')
-    plt.title('Optimization Path: Growth Rates vs EV Multiples')
-    plt.xlabel('Growth Rate')
-    plt.ylabel('EV/EBITDA Multiple')
-    plt.grid(True)
+    best = int(np.argmax(values))
+    history = [(float(path[best, 0]), float(path[best, 1]), float(objective_function(path[best, 0], path[best, 1])))
+               for path in paths[:iterations[best] + 1]]
+    return {
+        'best_point': points[best],
+        'best_value': values[best],
+        'iterations': iterations,
+        'converged': converged,
+        'history': history,
+    }
 
-    plt.subplot(2, 1, 2)
-    plt.plot(range(len(objective_values)), objective_values)
-    plt.title('Objective Function Value Over Iterations')
-    plt.xlabel('Iteration')
-    plt.ylabel('Objective Value')
-    plt.grid(True)
+def run_optimization(financial_data, num_starts=NUM_STARTS, seed=0):
+    initial_growth_rate = financial_data['initial_growth_rate']
+    initial_ev_multiple = financial_data['initial_ev_ebitda']
 
-    plt.tight_layout()
-    plt.savefig(f'{image_path}/optimization_results_chart.png')
-    plt.close()
+    # The current plan plus random starts across the feasible box
+    rng = np.random.default_rng(seed)
+    starts = np.column_stack([rng.uniform(*GROWTH_RATE_BOUNDS, num_starts), rng.uniform(*EV_MULTIPLE_BOUNDS, num_starts)])
+    starts[0] = initial_growth_rate, initial_ev_multiple
+    result = multi_start_gradient_ascent(starts)
 
-    # Update financial_data with optimized values, capping growth rate at 200%
-    financial_data['optimized_growth_rate'] = min(2.00, growth_rates[-1])
-    financial_data['optimized_ev_ebitda'] = max(8, min(20, ev_multiples[-1]))
+    financial_data['optimized_growth_rate'] = result['best_point'][0]
+    financial_data['optimized_ev_ebitda'] = result['best_point'][1]
     financial_data['optimization_improvement'] = (financial_data['optimized_growth_rate'] - financial_data['initial_growth_rate']) / financial_data['initial_growth_rate']
+    financial_data['optimization_starts'] = num_starts
+    financial_data['optimization_iterations'] = int(result['iterations'].sum())
+    financial_data['optimization_converged'] = float(result['converged'].mean())
 
-    return financial_data
\ No newline at end of file
+    return result['history']
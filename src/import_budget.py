@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+import logging
+import argparse
+import subprocess
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Cold-import limits for the entry points that must start fast, and the libraries they must not load.
+# Plotting and PDF libraries belong to the chart and deck stages and are imported when those run
+IMPORT_BUDGETS = {
+    'analyze': 0.5,
+    'financial_analysis': 0.5,
+    'pitch_deck': 0.5,
+}
+HEAVY_MODULES = ('matplotlib', 'pandas', 'fpdf', 'PIL')
+
+_MEASURE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+def measure_import(module, repeat=3):
+    # Each import runs in a fresh interpreter, as a CLI call or serverless cold start would; the fastest of
+    # `repeat` runs is kept so a busy machine does not fail the check
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    code = _MEASURE.format(module=module, heavy=HEAVY_MODULES)
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, '-c', code], cwd=src_dir, capture_output=True, text=True, check=True)
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return {'seconds': min(run['seconds'] for run in runs), 'heavy': runs[-1]['heavy']}
+
+def check_import_budgets(budgets=None, repeat=3):
+    failures = []
+    for module, budget in (budgets or IMPORT_BUDGETS).items():
+        result = measure_import(module, repeat)
+        logging.info(f"import {module}: {result['seconds']:.3f}s (budget {budget:.3f}s)")
+        if result['seconds'] > budget:
+            failures.append(f"import {module} took {result['seconds']:.3f}s, over its {budget:.3f}s budget")
+        if result['heavy']:
+            failures.append(f"import {module} loaded {', '.join(result['heavy'])}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that the analysis entry points import within their time budget '
+                                                 'and without plotting or PDF libraries.')
+    parser.add_argument('--repeat', type=int, default=3, help='Fresh-interpreter imports per module; the fastest counts')
+    args = parser.parse_args()
+
+    failures = check_import_budgets(repeat=args.repeat)
+    for failure in failures:
+        logging.error(failure)
+    if failures:
+        raise SystemExit(f"{len(failures)} import budget check(s) failed")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-import matplotlib.pyplot as plt
+from chart_output import save_chart
 
 def generate_milestones_chart(image_path, financial_data):
+    import matplotlib.pyplot as plt
     milestones = financial_data['milestones']
     years = financial_data['milestone_years']
 
@@ -12,5 +13,6 @@ def generate_milestones_chart(image_path, financial_data):
     ax.set_ylabel('Milestone')
     ax.grid(True)
 
-    plt.savefig(f'{image_path}/milestones_chart.png')
-    plt.close()
\ No newline at end of file
+    chart = save_chart(image_path, 'milestones_chart.png')
+    plt.close()
+    return chart
\ No newline at end of file
@@ -1,35 +1,320 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import matplotlib.pyplot as plt
+from chart_output import save_chart, quality_profile
 
-def generate_monte_carlo_chart(image_path, financial_data):
-    num_simulations = 1000
-    num_years = 10
-    initial_revenue = financial_data['revenue_projections'][0]
-    growth_rate = 0.25  # Reduced to keep it under 200% per year
-    volatility = 0.15  # Adjusted for more realistic scenarios
-
-    simulations = np.zeros((num_simulations, num_years))
-    for i in range(num_simulations):
-        revenue = initial_revenue
-        for j in range(num_years):
-            growth = min(np.random.normal(growth_rate, volatility), 2.0)  # Cap growth at 200%
-            revenue *= (1 + growth)
-            simulations[i, j] = revenue
-
-    unicorn_threshold = 1e9  # $1 billion
-    unicorn_years = np.argmax(simulations >= unicorn_threshold, axis=1)
-    unicorn_years = np.where(unicorn_years == 0, num_years, unicorn_years)
-    unicorn_probability = np.sum(unicorn_years < num_years) / num_simulations
+# Paths are split into fixed-size blocks, each with its own SeedSequence child, so a
+# seeded parallel run gives the same result whatever the number of workers.
+DEFAULT_BLOCK_SIZE = 100_000
+NUM_SAMPLE_PATHS = 1000
+
+# Fixed-bin histogram used as a mergeable sketch for approximate per-year percentiles
+DEFAULT_NUM_BINS = 4096
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Above this many paths the chart switches from one line per path to a percentile fan
+MAX_PLOTTED_PATHS = 1000
+NUM_FAN_SAMPLE_PATHS = 50
+
+# Revenue milestones tracked for time-to-threshold distributions
+DEFAULT_PASSAGE_THRESHOLDS = (1e8, 5e8, 1e9, 5e9)
+
+def simulate_revenue_paths(initial_revenue, num_simulations=1000, num_years=10, growth_rate=0.25,
+                           volatility=0.15, growth_cap=2.0, seed=None):
+    rng = np.random.default_rng(seed)
+
+    # One batched draw for every path and year, capped at growth_cap (200% by default)
+    growth = rng.normal(growth_rate, volatility, size=(num_simulations, num_years))
+    np.minimum(growth, growth_cap, out=growth)
+    growth += 1.0
+
+    # Compound along the year axis in place to avoid a second full-size matrix
+    np.cumprod(growth, axis=1, out=growth)
+    growth *= initial_revenue
+    return growth
+
+def _unicorn_years(simulations, unicorn_threshold):
+    # Zero-based first year at or above the threshold, num_years if never; the running maximum only
+    # rises, so the years spent below it are exactly the years before the first passage
+    return np.sum(np.maximum.accumulate(simulations, axis=1) < unicorn_threshold, axis=1)
+
+def first_passage_counts(simulations, thresholds):
+    # (num_years, num_thresholds) number of paths that have reached each threshold by each year, from one
+    # pass over the running maxima: searchsorted gives how many sorted thresholds each value has crossed
+    num_years = simulations.shape[1]
+    order = np.argsort(thresholds)
+    sorted_thresholds = np.asarray(thresholds, dtype=np.float64)[order]
+    levels = np.searchsorted(sorted_thresholds, np.maximum.accumulate(simulations, axis=1), side='right')
+    levels += np.arange(num_years) * (len(thresholds) + 1)
+    per_level = np.bincount(levels.ravel(), minlength=num_years * (len(thresholds) + 1)).reshape(num_years, -1)
+    reached = np.cumsum(per_level[:, ::-1], axis=1)[:, ::-1][:, 1:]
+    counts = np.empty_like(reached)
+    counts[:, order] = reached
+    return counts
+
+def first_passage_statistics(counts, num_simulations, thresholds):
+    num_years = counts.shape[0]
+    years = np.arange(1, num_years + 1)
+    hits = np.diff(counts, axis=0, prepend=0)
+    survival = 1 - counts / num_simulations
+    total_hits = counts[-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_year = (hits * years[:, np.newaxis]).sum(axis=0) / total_hits
+    # First year by which half of all paths have passed; NaN when that never happens within the horizon
+    median_year = np.where(survival[-1] <= 0.5, np.argmax(survival <= 0.5, axis=0) + 1, np.nan)
+    return {
+        'thresholds': list(thresholds),
+        'probability': (total_hits / num_simulations).tolist(),
+        'mean_year': mean_year.tolist(),
+        'median_year': median_year.tolist(),
+        'histogram': hits.T.tolist(),
+        'survival': survival.T.tolist(),
+    }
+
+def calculate_unicorn_statistics(simulations, unicorn_threshold=1e9):
+    num_simulations, num_years = simulations.shape
+    unicorn_years = _unicorn_years(simulations, unicorn_threshold)
+    unicorn_hit = unicorn_years < num_years
+    unicorn_probability = np.sum(unicorn_hit) / num_simulations
+    # avg_unicorn_year counts paths that never get there as year num_years + 1; the first-passage mean only
+    # averages the paths that do, and is NaN when none does
     avg_unicorn_year = np.mean(unicorn_years) + 1
+    mean_first_passage_year = np.mean(unicorn_years[unicorn_hit]) + 1 if unicorn_hit.any() else np.nan
+    return unicorn_probability, avg_unicorn_year, mean_first_passage_year
+
+def default_bin_edges(initial_revenue, num_years, growth_cap=2.0, num_bins=DEFAULT_NUM_BINS):
+    # Log-spaced bins from 1% of the starting revenue up to the largest capped outcome
+    upper = initial_revenue * (1 + growth_cap) ** num_years
+    return np.geomspace(initial_revenue * 0.01, upper, num_bins + 1)
+
+def summarize_paths(simulations, unicorn_threshold=1e9, bin_edges=None, passage_thresholds=None):
+    num_simulations, num_years = simulations.shape
+    unicorn_years = _unicorn_years(simulations, unicorn_threshold)
+    unicorn_hit = unicorn_years < num_years
+
+    year_mean = simulations.mean(axis=0)
+    stats = {
+        'count': num_simulations,
+        'unicorn_hits': int(np.sum(unicorn_hit)),
+        'unicorn_year_sum': int(np.sum(unicorn_years)),
+        'unicorn_hit_year_sum': int(np.sum(unicorn_years[unicorn_hit])),
+        'year_mean': year_mean,
+        'year_m2': ((simulations - year_mean) ** 2).sum(axis=0)
+    }
+    if passage_thresholds is not None:
+        stats['passage_counts'] = first_passage_counts(simulations, passage_thresholds)
+
+    if bin_edges is not None:
+        # Bins are evenly spaced in log space, so the bin index is a direct computation;
+        # non-positive and out-of-range revenues land in the first or last bin
+        num_bins = len(bin_edges) - 1
+        log_low = np.log(bin_edges[0])
+        log_step = (np.log(bin_edges[-1]) - log_low) / num_bins
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scaled = (np.log(simulations) - log_low) / log_step
+        np.nan_to_num(scaled, copy=False, nan=0.0)
+        bins = np.clip(scaled, 0, num_bins - 1).astype(np.int64)
+        bins += np.arange(num_years) * num_bins
+        stats['histogram'] = np.bincount(bins.ravel(), minlength=num_years * num_bins).reshape(num_years, num_bins)
+
+    return stats
+
+def merge_path_statistics(first, second):
+    # Chan et al. pairwise update for the per-year mean and sum of squared deviations
+    count = first['count'] + second['count']
+    delta = second['year_mean'] - first['year_mean']
+    merged = {
+        'count': count,
+        'unicorn_hits': first['unicorn_hits'] + second['unicorn_hits'],
+        'unicorn_year_sum': first['unicorn_year_sum'] + second['unicorn_year_sum'],
+        'unicorn_hit_year_sum': first['unicorn_hit_year_sum'] + second['unicorn_hit_year_sum'],
+        'year_mean': first['year_mean'] + delta * (second['count'] / count),
+        'year_m2': first['year_m2'] + second['year_m2'] + delta ** 2 * (first['count'] * second['count'] / count)
+    }
+    if 'histogram' in first:
+        merged['histogram'] = first['histogram'] + second['histogram']
+    if 'passage_counts' in first:
+        merged['passage_counts'] = first['passage_counts'] + second['passage_counts']
+    return merged
+
+def histogram_percentiles(histogram, bin_edges, percentiles):
+    # Interpolate inside the bin holding each rank, in log space to match the bin spacing
+    log_edges = np.log(bin_edges)
+    cumulative = np.cumsum(histogram, axis=1)
+    results = np.empty((len(percentiles), histogram.shape[0]))
+    for year, year_cumulative in enumerate(cumulative):
+        ranks = np.asarray(percentiles) / 100 * year_cumulative[-1]
+        bins = np.minimum(np.searchsorted(year_cumulative, ranks, side='left'), len(year_cumulative) - 1)
+        below = np.where(bins > 0, year_cumulative[bins - 1], 0)
+        fraction = (ranks - below) / np.maximum(histogram[year, bins], 1)
+        results[:, year] = np.exp(log_edges[bins] + fraction * (log_edges[bins + 1] - log_edges[bins]))
+    return results
+
+def finalize_path_statistics(stats, bin_edges=None, percentiles=DEFAULT_PERCENTILES, passage_thresholds=None):
+    count = stats['count']
+    hits = stats['unicorn_hits']
+    results = {
+        'num_simulations': count,
+        'unicorn_probability': hits / count,
+        'avg_unicorn_year': stats['unicorn_year_sum'] / count + 1,
+        'mean_first_passage_year': stats['unicorn_hit_year_sum'] / hits + 1 if hits else np.nan,
+        'year_mean': stats['year_mean'],
+        'year_std': np.sqrt(stats['year_m2'] / count)
+    }
+    if 'histogram' in stats:
+        results['percentiles'] = dict(zip(percentiles, histogram_percentiles(stats['histogram'], bin_edges, percentiles)))
+    if 'passage_counts' in stats:
+        results['first_passage'] = first_passage_statistics(stats['passage_counts'], count, passage_thresholds)
+    return results
 
-    plt.figure(figsize=(10, 6))
-    plt.plot(range(1, num_years + 1), simulations.T, alpha=0.1, color='blue')
+def _simulate_block(block):
+    (seed_sequence, initial_revenue, num_paths, num_years, growth_rate, volatility, growth_cap, unicorn_threshold, bin_edges,
+     num_samples, passage_thresholds) = block
+    simulations = simulate_revenue_paths(initial_revenue, num_paths, num_years, growth_rate,
+                                         volatility, growth_cap, seed_sequence)
+    return summarize_paths(simulations, unicorn_threshold, bin_edges, passage_thresholds), simulations[:num_samples].copy()
+
+def _map_bounded(executor, func, items, max_pending):
+    # Like executor.map, but only max_pending items are submitted ahead of the result being consumed,
+    # so a long run never holds every block's description and statistics at once
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def run_monte_carlo_simulation(financial_data, num_simulations=1000, num_years=10, growth_rate=0.25,
+                               volatility=0.15, growth_cap=2.0, unicorn_threshold=1e9, seed=None,
+                               passage_thresholds=DEFAULT_PASSAGE_THRESHOLDS):
+    if num_simulations < 1:
+        raise ValueError(f"Monte Carlo needs at least one path, got {num_simulations}")
+    initial_revenue = financial_data['revenue_projections'][0]
+    simulations = simulate_revenue_paths(initial_revenue, num_simulations, num_years, growth_rate,
+                                         volatility, growth_cap, seed)
+    unicorn_probability, avg_unicorn_year, mean_first_passage_year = calculate_unicorn_statistics(simulations, unicorn_threshold)
+
+    return {
+        'simulations': simulations,
+        'num_years': num_years,
+        'unicorn_threshold': unicorn_threshold,
+        'unicorn_probability': unicorn_probability,
+        'avg_unicorn_year': avg_unicorn_year,
+        'mean_first_passage_year': mean_first_passage_year,
+        'first_passage': first_passage_statistics(first_passage_counts(simulations, passage_thresholds), num_simulations,
+                                                  passage_thresholds)
+    }
+
+def run_streaming_monte_carlo_simulation(financial_data, num_simulations=1000, num_years=10, growth_rate=0.25,
+                                         volatility=0.15, growth_cap=2.0, unicorn_threshold=1e9, seed=None,
+                                         chunk_size=DEFAULT_BLOCK_SIZE, num_workers=1, num_bins=DEFAULT_NUM_BINS,
+                                         percentiles=DEFAULT_PERCENTILES, passage_thresholds=DEFAULT_PASSAGE_THRESHOLDS):
+    if num_simulations < 1 or chunk_size < 1:
+        raise ValueError(f"Monte Carlo needs at least one path and one path per chunk, got {num_simulations} paths "
+                         f"in chunks of {chunk_size}")
+    initial_revenue = financial_data['revenue_projections'][0]
+    bin_edges = default_bin_edges(initial_revenue, num_years, growth_cap, num_bins)
+    num_blocks = -(-num_simulations // chunk_size)
+    seed_sequences = np.random.SeedSequence(seed).spawn(num_blocks)
+
+    # Blocks are described lazily so only a bounded number of chunks ever exists at once
+    blocks = (
+        (seed_sequence, initial_revenue, min(chunk_size, num_simulations - index * chunk_size), num_years,
+         growth_rate, volatility, growth_cap, unicorn_threshold, bin_edges, NUM_SAMPLE_PATHS if index == 0 else 0,
+         passage_thresholds)
+        for index, seed_sequence in enumerate(seed_sequences)
+    )
+
+    num_workers = min(num_workers or os.cpu_count() or 1, num_blocks)
+    executor = ProcessPoolExecutor(max_workers=num_workers) if num_workers > 1 else None
+    try:
+        block_results = _map_bounded(executor, _simulate_block, blocks, 2 * num_workers) if executor else map(_simulate_block, blocks)
+
+        # Merge in block order, never completion order, so floating point sums are reproducible
+        stats, sample_paths = next(block_results)
+        for block_stats, _ in block_results:
+            stats = merge_path_statistics(stats, block_stats)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    results = finalize_path_statistics(stats, bin_edges, percentiles, passage_thresholds)
+    results.update({
+        'sample_paths': sample_paths,
+        'num_years': num_years,
+        'unicorn_threshold': unicorn_threshold
+    })
+    return results
+
+def run_parallel_monte_carlo_simulation(financial_data, num_simulations=1000, num_years=10, growth_rate=0.25,
+                                        volatility=0.15, growth_cap=2.0, unicorn_threshold=1e9, seed=None,
+                                        num_workers=None, block_size=DEFAULT_BLOCK_SIZE):
+    return run_streaming_monte_carlo_simulation(financial_data, num_simulations, num_years, growth_rate, volatility,
+                                                growth_cap, unicorn_threshold, seed, chunk_size=block_size,
+                                                num_workers=num_workers)
+
+def _plotted_paths():
+    profile = quality_profile()
+    return profile['plotted_paths'] if profile else MAX_PLOTTED_PATHS
+
+def _plot_fan_chart(years, monte_carlo_results, simulations):
+    import matplotlib.pyplot as plt
+    percentiles = monte_carlo_results.get('percentiles')
+    if percentiles is None:
+        percentiles = dict(zip(DEFAULT_PERCENTILES, np.percentile(simulations, DEFAULT_PERCENTILES, axis=0)))
+
+    # A handful of artists regardless of how many paths were simulated
+    rng = np.random.default_rng(0)
+    sample = simulations[rng.choice(len(simulations), min(NUM_FAN_SAMPLE_PATHS, _plotted_paths(), len(simulations)), replace=False)]
+    plt.plot(years, sample.T, alpha=0.15, color='blue', linewidth=0.8)
+    plt.fill_between(years, percentiles[5], percentiles[95], color='blue', alpha=0.15, label='5th-95th Percentile')
+    plt.fill_between(years, percentiles[25], percentiles[75], color='blue', alpha=0.3, label='25th-75th Percentile')
+    plt.plot(years, percentiles[50], color='navy', linewidth=2, label='Median')
+
+def generate_monte_carlo_chart(image_path, financial_data, monte_carlo_results=None, chart_mode=None):
+    import matplotlib.pyplot as plt
+    if monte_carlo_results is None:
+        monte_carlo_results = run_monte_carlo_simulation(financial_data)
+
+    # Parallel and streaming runs only keep a sample of paths
+    simulations = monte_carlo_results.get('simulations', monte_carlo_results.get('sample_paths'))
+    num_years = monte_carlo_results['num_years']
+    unicorn_threshold = monte_carlo_results['unicorn_threshold']
+    years = range(1, num_years + 1)
+
+    if chart_mode is None:
+        large_run = monte_carlo_results.get('num_simulations', len(simulations)) > MAX_PLOTTED_PATHS
+        chart_mode = 'fan' if large_run or 'percentiles' in monte_carlo_results else 'paths'
+
+    plt.figure(figsize=(15, 6))
+    plt.subplot(1, 2, 1)
+    if chart_mode == 'fan':
+        _plot_fan_chart(years, monte_carlo_results, simulations)
+    elif chart_mode == 'paths':
+        plt.plot(years, simulations[:_plotted_paths()].T, alpha=0.1, color='blue')
+    else:
+        raise ValueError(f"Unknown Monte Carlo chart mode: {chart_mode}")
     plt.axhline(y=unicorn_threshold, color='r', linestyle='--', label='Unicorn Threshold')
     plt.title('Monte Carlo Simulation of Revenue Growth')
     plt.xlabel('Years')
     plt.ylabel('Revenue ($)')
     plt.legend()
-    plt.savefig(f'{image_path}/monte_carlo_chart.png')
+
+    # Share of paths still below each revenue milestone, year by year
+    first_passage = monte_carlo_results.get('first_passage')
+    if first_passage:
+        plt.subplot(1, 2, 2)
+        for threshold, survival in zip(first_passage['thresholds'], first_passage['survival']):
+            plt.step(years, survival, where='post', label=f'\\${threshold / 1e9:g}B' if threshold >= 1e9 else f'\\${threshold / 1e6:g}M')
+        plt.ylim(0, 1.05)
+        plt.title('Survival Curves: Share of Paths Below Revenue Milestone')
+        plt.xlabel('Years')
+        plt.ylabel('Share of Paths Not Yet Reached')
+        plt.legend()
+    plt.tight_layout()
+    chart = save_chart(image_path, 'monte_carlo_chart.png')
     plt.close()
 
-    return unicorn_probability, avg_unicorn_year, f'{image_path}/monte_carlo_chart.png'
+    return monte_carlo_results['unicorn_probability'], monte_carlo_results['avg_unicorn_year'], chart
@@ -0,0 +1,440 @@
+import os
+import io
+import re
+import math
+import pickle
+import hashlib
+import logging
+from fpdf import FPDF
+from fpdf.ttfonts import TTFontFile
+from PIL import Image
+from collections import OrderedDict
+
+FONT_DIR = os.environ.get('PITCHDECK_FONT_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fonts'))
+FONT_CACHE_DIR = os.environ.get('PITCHDECK_FONT_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'pitchdeck', 'fonts'))
+
+DEFAULT_IMAGE_DPI = 150
+DEFAULT_JPEG_QUALITY = 85
+MAX_REGISTERED_IMAGES = 64
+
+# Parsed TrueType metrics shared by every document in the process, keyed by font file path
+_font_registry = {}
+
+# Optimized image encodings shared by every document in the process, e.g. the static charts of a batch
+_image_registry = OrderedDict()
+
+def configure_font_cache(cache_dir):
+    global FONT_CACHE_DIR
+    FONT_CACHE_DIR = cache_dir
+
+def _writable_cache_dir():
+    try:
+        os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+    except OSError:
+        return None
+    return FONT_CACHE_DIR if os.access(FONT_CACHE_DIR, os.W_OK) else None
+
+def _cache_path(ttf_path, cache_dir, suffix):
+    stat = os.stat(ttf_path)
+    fingerprint = hashlib.sha256(f'{os.path.abspath(ttf_path)}:{stat.st_size}:{stat.st_mtime_ns}'.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f'{os.path.splitext(os.path.basename(ttf_path))[0]}-{fingerprint}{suffix}')
+
+def _parse_font_metrics(ttf_path):
+    # Same metrics fpdf computes in add_font, kept here so they can be shared and cached
+    ttf = TTFontFile()
+    ttf.getMetrics(ttf_path)
+    return {
+        'name': re.sub('[ ()]', '', ttf.fullName),
+        'type': 'TTF',
+        'desc': {
+            'Ascent': int(round(ttf.ascent, 0)),
+            'Descent': int(round(ttf.descent, 0)),
+            'CapHeight': int(round(ttf.capHeight, 0)),
+            'Flags': ttf.flags,
+            'FontBBox': "[%s %s %s %s]" % tuple(int(round(value, 0)) for value in ttf.bbox[:4]),
+            'ItalicAngle': int(ttf.italicAngle),
+            'StemV': int(round(ttf.stemV, 0)),
+            'MissingWidth': int(round(ttf.defaultWidth, 0)),
+        },
+        'up': round(ttf.underlinePosition),
+        'ut': round(ttf.underlineThickness),
+        'originalsize': os.stat(ttf_path).st_size,
+        'cw': ttf.charWidths,
+    }
+
+def load_font_metrics(ttf_path):
+    ttf_path = os.path.abspath(ttf_path)
+    if ttf_path in _font_registry:
+        return _font_registry[ttf_path]
+
+    cache_dir = _writable_cache_dir()
+    cache_path = _cache_path(ttf_path, cache_dir, '.pkl') if cache_dir else None
+    font_metrics = None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            font_metrics = pickle.load(f)
+    if font_metrics is None:
+        font_metrics = _parse_font_metrics(ttf_path)
+        if cache_path:
+            try:
+                with open(cache_path, 'wb') as f:
+                    pickle.dump(font_metrics, f)
+            except OSError as e:
+                logging.warning(f"Could not write font metrics cache {cache_path}: {str(e)}")
+
+    _font_registry[ttf_path] = font_metrics
+    return font_metrics
+
+def _decode_image(data):
+    # Pillow decodes the PNG in C instead of fpdf's per-row Python alpha split
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        alpha = None
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            img = img.convert('RGBA' if img.mode != 'LA' else 'LA')
+            alpha = img.getchannel('A')
+            # Matplotlib writes RGBA even for fully opaque charts; those need no soft mask
+            if alpha.getextrema() == (255, 255):
+                alpha = None
+            img = img.convert('RGB' if img.mode == 'RGBA' else 'L')
+        elif img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        return img, alpha
+
+def _png_stream(img):
+    # The IDAT data of a PNG is already a predictor-filtered Flate stream PDF can embed as is
+    buffer = io.BytesIO()
+    img.save(buffer, 'PNG', compress_level=6)
+    png = buffer.getvalue()
+    bit_depth = png[24]
+    chunks = []
+    position = 8
+    while position < len(png):
+        length = int.from_bytes(png[position:position + 4], 'big')
+        if png[position + 4:position + 8] == b'IDAT':
+            chunks.append(png[position + 8:position + 8 + length])
+        position += 12 + length
+    return b''.join(chunks), bit_depth
+
+def _embedded_size(info):
+    if 'form' in info:
+        return len(info['data']) + sum(len(object_dict) + len(stream or b'') for object_dict, stream in info['form']['objects'].values())
+    return len(info['data']) + len(info.get('smask', b'')) + len(info.get('pal', b''))
+
+def _registered_encoding(name, source, size, jpeg_quality):
+    cache_key = (name, size, jpeg_quality)
+    if cache_key not in _image_registry:
+        _image_registry[cache_key] = _encode_image(source, size, jpeg_quality)
+        while len(_image_registry) > MAX_REGISTERED_IMAGES:
+            _image_registry.popitem(last=False)
+    _image_registry.move_to_end(cache_key)
+    return _image_registry[cache_key]
+
+def _encode_image(source, size, jpeg_quality):
+    img, alpha = _decode_image(source)
+    if size != img.size:
+        img = img.resize(size, Image.LANCZOS)
+        alpha = alpha.resize(size, Image.LANCZOS) if alpha is not None else None
+
+    encoded = {'w': img.width, 'h': img.height, 'bpc': 8, 'pal': '', 'trns': ''}
+    # fpdf writes a palette and a soft mask to the same object slot, so only opaque images get a palette
+    colors = img.getcolors(256) if img.mode == 'RGB' and alpha is None else None
+    if colors is not None:
+        # Flat artwork with at most 256 colors maps exactly onto a palette
+        palette = Image.new('P', (1, 1))
+        palette.putpalette([channel for _, color in colors for channel in color])
+        img = img.quantize(palette=palette, dither=Image.Dither.NONE)
+        encoded['cs'] = 'Indexed'
+        encoded['pal'] = bytes(img.getpalette()[:3 * len(colors)])
+    else:
+        encoded['cs'] = 'DeviceRGB' if img.mode == 'RGB' else 'DeviceGray'
+
+    data, bit_depth = _png_stream(img)
+    encoded.update({'f': 'FlateDecode', 'data': data, 'bpc': bit_depth,
+                    'dp': f"/Predictor 15 /Colors {3 if img.mode == 'RGB' else 1} /BitsPerComponent {bit_depth} /Columns {img.width}"})
+    if jpeg_quality and colors is None and alpha is None:
+        # Photographic content compresses far better lossy; charts stay lossless unless JPEG is much smaller
+        buffer = io.BytesIO()
+        img.save(buffer, 'JPEG', quality=jpeg_quality)
+        if buffer.tell() < len(data) / 2:
+            encoded.update({'f': 'DCTDecode', 'data': buffer.getvalue(), 'bpc': 8})
+            del encoded['dp']
+    if alpha is not None:
+        # fpdf writes the soft mask with the image's filter, so images with transparency are never JPEG
+        encoded['smask'] = _png_stream(alpha)[0]
+    return encoded
+
+class PitchDeckPDF(FPDF):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.font_families = {}
+        self.registered_fonts = {}
+        self.page_placements = {}
+        self.image_optimization = {'target_dpi': None, 'jpeg_quality': None}
+        self.image_report = None
+
+    def register_font_family(self, family, styles, font_dir=None):
+        # Fonts are only embedded once a page selects them, so unused styles cost nothing
+        font_dir = font_dir or FONT_DIR
+        self.font_families[family.lower()] = {style.upper(): os.path.join(font_dir, filename) for style, filename in styles.items()}
+
+    def _add_registered_font(self, family, style):
+        ttf_path = self.font_families[family][style]
+        if not os.path.exists(ttf_path):
+            raise RuntimeError(f"TTF Font file not found: {ttf_path}")
+        font_metrics = load_font_metrics(ttf_path)
+        cache_dir = _writable_cache_dir()
+        fontkey = family + style
+
+        # Mirrors the entry FPDF.add_font(uni=True) creates; only 'subset' is per document
+        self.fonts[fontkey] = {
+            'i': len(self.fonts) + 1, 'type': font_metrics['type'],
+            'name': font_metrics['name'], 'desc': font_metrics['desc'],
+            'up': font_metrics['up'], 'ut': font_metrics['ut'],
+            'cw': font_metrics['cw'],
+            'ttffile': os.path.abspath(ttf_path), 'fontkey': fontkey,
+            'subset': list(range(0, 57)) if hasattr(self, 'str_alias_nb_pages') else list(range(0, 32)),
+            'unifilename': _cache_path(ttf_path, cache_dir, '.pkl') if cache_dir else None,
+        }
+        self.font_files[fontkey] = {'length1': font_metrics['originalsize'], 'type': "TTF", 'ttffile': os.path.abspath(ttf_path)}
+        self.font_files[ttf_path] = {'type': "TTF"}
+        self.registered_fonts[fontkey] = (family, style)
+
+    def set_font(self, family, style='', size=0):
+        family_key = family.lower()
+        style_key = style.upper().replace('U', '')
+        if style_key == 'IB':
+            style_key = 'BI'
+        if family_key in self.font_families and family_key + style_key not in self.fonts:
+            self._add_registered_font(family_key, style_key)
+        super().set_font(family, style, size)
+
+    def image(self, name, x=None, y=None, w=0, h=0, type='', link=''):
+        # Images are keyed by content, so a chart placed twice, or passed once as bytes and once as a file, is embedded once
+        if isinstance(name, (bytes, bytearray, io.BytesIO)):
+            data = name.getvalue() if isinstance(name, io.BytesIO) else bytes(name)
+        elif name.startswith(('http://', 'https://')):
+            return super().image(name, x, y, w, h, type, link)
+        else:
+            with open(name, 'rb') as f:
+                data = f.read()
+        name = hashlib.sha1(data).hexdigest()
+        if name not in self.images:
+            self._add_image(name, self._parse_pdf_form(data) if data.startswith(b'%PDF') else self._parse_image(data))
+
+        # Same sizing rules as FPDF.image; the largest placement decides how far the image can be downsampled
+        info = self.images[name]
+        if w == 0 and h == 0:
+            w, h = info['w'] / self.k, info['h'] / self.k
+        elif w == 0:
+            w = h * info['w'] / info['h']
+        elif h == 0:
+            h = w * info['h'] / info['w']
+        info['placements'] += 1
+        info['placed_size'] = (max(info['placed_size'][0], w * self.k), max(info['placed_size'][1], h * self.k))
+        count, placed_size = self.page_placements.get(name, (0, (0, 0)))
+        self.page_placements[name] = (count + 1, (max(placed_size[0], w * self.k), max(placed_size[1], h * self.k)))
+        return super().image(name, x, y, w, h, type, link)
+
+    def _beginpage(self, orientation):
+        self.page_placements = {}
+        super()._beginpage(orientation)
+
+    def _add_image(self, name, info):
+        info['i'] = len(self.images) + 1
+        info['placements'] = 0
+        info['placed_size'] = (0, 0)
+        self.images[name] = info
+
+    def record_page(self, render):
+        # Renders a page and returns it in a form restore_page can replay into any document:
+        # the content stream plus the fonts, glyphs and images it refers to by number
+        subset_sizes = {fontkey: len(font['subset']) for fontkey, font in self.fonts.items() if 'subset' in font}
+        render()
+        content = self.pages[self.page]
+        font_keys = {font['i']: fontkey for fontkey, font in self.fonts.items()}
+        image_names = {info['i']: name for name, info in self.images.items()}
+        fonts = {}
+        for number in sorted({int(number) for number in re.findall(r'/F(\d+) ', content)}):
+            fontkey = font_keys[number]
+            if fontkey not in self.registered_fonts:
+                raise ValueError(f"Only registered fonts can be recorded, not '{fontkey}'")
+            fonts[fontkey] = (self.registered_fonts[fontkey], self.fonts[fontkey]['subset'][subset_sizes.get(fontkey, 0):])
+        images = {}
+        for number in sorted({int(number) for number in re.findall(r'/I(\d+) Do', content)}):
+            info = self.images[image_names[number]]
+            images[image_names[number]] = {key: value for key, value in info.items() if key not in ('i', 'n', 'placements', 'placed_size')}
+        return {
+            'content': content,
+            'font_numbers': {number: font_keys[number] for number in font_keys},
+            'image_numbers': image_names,
+            'fonts': fonts,
+            'images': images,
+            'placements': dict(self.page_placements),
+            'end_font': (self.font_family, self.font_style, self.font_size_pt),
+        }
+
+    def restore_page(self, record):
+        self.add_page()
+        for fontkey, ((family, style), glyphs) in record['fonts'].items():
+            if fontkey not in self.fonts:
+                self._add_registered_font(family, style)
+            self.fonts[fontkey]['subset'].extend(glyphs)
+        for name, info in record['images'].items():
+            if name not in self.images:
+                self._add_image(name, dict(info))
+        for name, (count, (width, height)) in record['placements'].items():
+            info = self.images[name]
+            info['placements'] += count
+            info['placed_size'] = (max(info['placed_size'][0], width), max(info['placed_size'][1], height))
+
+        # Font and image numbers depend on the order they were first used in, so they are remapped
+        content = re.sub(r'/F(\d+) ', lambda match: f"/F{self.fonts[record['font_numbers'][int(match.group(1))]]['i']} ", record['content'])
+        content = re.sub(r'/I(\d+) Do', lambda match: f"/I{self.images[record['image_numbers'][int(match.group(1))]]['i']} Do", content)
+        self.pages[self.page] = content
+        family, style, size = record['end_font']
+        if family:
+            self.set_font(family, style, size)
+
+    def optimize_images(self, target_dpi=DEFAULT_IMAGE_DPI, jpeg_quality=DEFAULT_JPEG_QUALITY):
+        # Applied when the document is written, once every placement is known
+        self.image_optimization = {'target_dpi': target_dpi, 'jpeg_quality': jpeg_quality}
+
+    def _enddoc(self):
+        # Images are encoded before the header is written, since a soft mask raises the PDF version
+        self.image_report = self._encode_images(**self.image_optimization)
+        super()._enddoc()
+
+    def _encode_images(self, target_dpi, jpeg_quality):
+        report = {'images': 0, 'placements': 0, 'original_bytes': 0, 'optimized_bytes': 0}
+        for name, info in self.images.items():
+            if 'source' in info:
+                # The image file as supplied is what an unoptimized deck would carry
+                original_size = len(info['source'])
+                placed_width, placed_height = info['placed_size']
+                size = (min(info['w'], math.ceil(placed_width / 72 * target_dpi)) if target_dpi else info['w'],
+                        min(info['h'], math.ceil(placed_height / 72 * target_dpi)) if target_dpi else info['h'])
+                info.update(_registered_encoding(name, info['source'], size, jpeg_quality))
+                if 'smask' in info and self.pdf_version < '1.4':
+                    self.pdf_version = '1.4'
+            else:
+                original_size = _embedded_size(info)
+
+            report['images'] += 1
+            report['placements'] += info['placements']
+            # Without deduplication every placement would carry its own copy
+            report['original_bytes'] += original_size * info['placements']
+            report['optimized_bytes'] += _embedded_size(info)
+        report['bytes_saved'] = report['original_bytes'] - report['optimized_bytes']
+        return report
+
+    def _parsepng(self, name):
+        with open(name, 'rb') as f:
+            return self._parse_image(f.read())
+
+    def _parse_image(self, data):
+        # Only the header is read here; the pixels are decoded and encoded once, when the document is written
+        with Image.open(io.BytesIO(data)) as img:
+            return {'w': img.width, 'h': img.height, 'source': data}
+
+    def _parse_pdf_form(self, data):
+        # Vector charts keep the first page of a single-page PDF as a form XObject, so they stay sharp at any size
+        objects = _read_pdf_objects(data)
+        catalog = objects[_ref(data[data.rindex(b'trailer'):], b'/Root')][0]
+        pages = objects[_ref(catalog, b'/Pages')][0]
+        page = objects[int(re.search(rb'/Kids\s*\[\s*(\d+) 0 R', pages).group(1))][0]
+        x0, y0, x1, y1 = (float(value) for value in re.search(rb'/MediaBox\s*\[([^\]]*)\]', page).group(1).split())
+        content_dict, content = objects[_ref(page, b'/Contents')]
+
+        resources_ref = re.search(rb'/Resources\s+(\d+) 0 R', page)
+        resources = objects[int(resources_ref.group(1))][0] if resources_ref else b'<< >>'
+        # Copy every object the page's resources reach, e.g. fonts, glyph procedures and graphics states
+        reachable = []
+        pending = [int(ref) for ref in re.findall(rb'(\d+) 0 R', resources)]
+        while pending:
+            number = pending.pop()
+            if number in reachable:
+                continue
+            reachable.append(number)
+            pending.extend(int(ref) for ref in re.findall(rb'(\d+) 0 R', objects[number][0]))
+
+        if self.pdf_version < '1.4':
+            self.pdf_version = '1.4'
+        width, height = x1 - x0, y1 - y0
+        filter_match = re.search(rb'/Filter\s*/\w+', content_dict)
+        return {
+            'w': width, 'h': height, 'data': content,
+            'form': {
+                'bbox': (x0, y0, x1, y1),
+                'matrix': (1 / width, 0, 0, 1 / height, -x0 / width, -y0 / height),
+                'filter': filter_match.group(0) if filter_match else b'',
+                'resources': resources,
+                'objects': {number: objects[number] for number in sorted(reachable)},
+            },
+        }
+
+    def _putimage(self, info):
+        if 'form' not in info:
+            return super()._putimage(info)
+
+        form = info['form']
+        # The form takes the next object number, followed by the copied objects in order
+        numbers = {number: self.n + 2 + index for index, number in enumerate(form['objects'])}
+
+        def renumber(text):
+            return re.sub(rb'(\d+) 0 R', lambda match: b'%d 0 R' % numbers[int(match.group(1))], text)
+
+        self._newobj()
+        info['n'] = self.n
+        self._out(b'<< /Type /XObject /Subtype /Form /FormType 1 /BBox [%s] /Matrix [%s] /Resources %s %s /Length %d >>' % (
+            ' '.join(f'{value:.4f}' for value in form['bbox']).encode('latin1'),
+            ' '.join(f'{value:.8f}' for value in form['matrix']).encode('latin1'),
+            renumber(form['resources']), form['filter'], len(info['data'])))
+        self._putstream(info['data'])
+        self._out('endobj')
+        for object_dict, stream in form['objects'].values():
+            self._newobj()
+            self._out(renumber(object_dict))
+            if stream is not None:
+                self._putstream(stream)
+            self._out('endobj')
+
+def _ref(text, key):
+    return int(re.search(re.escape(key) + rb'\s+(\d+) 0 R', text).group(1))
+
+def _read_pdf_objects(data):
+    # Enough of a reader for matplotlib's PDF output: a classic cross-reference table and no object streams
+    startxref = int(data[data.rindex(b'startxref') + len(b'startxref'):].split()[0])
+    table = re.match(rb'xref\s+(\d+)\s+(\d+)\s+', data[startxref:])
+    if table is None:
+        raise ValueError("Unsupported PDF: no cross-reference table")
+    first, count = int(table.group(1)), int(table.group(2))
+    entries = re.findall(rb'(\d{10}) (\d{5}) ([nf])', data[startxref + table.end():startxref + table.end() + 20 * count])
+
+    raw = {}
+    for index, (offset, _, kind) in enumerate(entries):
+        if kind != b'n':
+            continue
+        start = re.compile(rb'\d+\s+\d+\s+obj\s*').match(data, int(offset)).end()
+        stream_start = data.find(b'stream', start)
+        end = data.find(b'endobj', start)
+        raw[first + index] = (start, stream_start if 0 <= stream_start < end else None, end)
+
+    objects = {}
+    for number, (start, stream_start, end) in raw.items():
+        if stream_start is None:
+            objects[number] = (data[start:end].strip(), None)
+            continue
+        object_dict = data[start:stream_start].strip()
+        length = re.search(rb'/Length\s+(\d+)(\s+0 R)?', object_dict)
+        if length.group(2):
+            indirect_start, _, indirect_end = raw[int(length.group(1))]
+            stream_length = int(data[indirect_start:indirect_end].strip())
+        else:
+            stream_length = int(length.group(1))
+        data_start = stream_start + len(b'stream')
+        data_start += 2 if data[data_start:data_start + 2] == b'\r\n' else 1
+        # Lengths are inlined so the copied dictionaries no longer reference the length objects
+        object_dict = object_dict[:length.start()] + b'/Length %d' % stream_length + object_dict[length.end():]
+        objects[number] = (object_dict, data[data_start:data_start + stream_length])
+    return objects
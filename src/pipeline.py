@@ -0,0 +1,85 @@
+import time
+import logging
+from collections import namedtuple
+
+# A named step that reads its inputs from, and writes its outputs to, the pipeline's values
+Stage = namedtuple('Stage', ['name', 'func', 'inputs', 'outputs'])
+
+class Pipeline:
+    def __init__(self, stages, inputs=None):
+        self.stages = {}
+        self.producers = {}
+        self.values = dict(inputs or {})
+        self.timings = {}
+
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage: {stage.name}")
+            for output in stage.outputs:
+                if output in self.producers or output in self.values:
+                    raise ValueError(f"Output '{output}' of stage '{stage.name}' is already provided")
+                self.producers[output] = stage.name
+            self.stages[stage.name] = stage
+
+    def execution_order(self, targets):
+        order = []
+        visiting = set()
+        visited = set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle in pipeline at stage '{name}'")
+            visiting.add(name)
+            for input_name in self.stages[name].inputs:
+                if input_name in self.values and input_name not in self.producers:
+                    continue
+                if input_name not in self.producers:
+                    raise ValueError(f"No stage produces '{input_name}' required by stage '{name}'")
+                visit(self.producers[input_name])
+            visiting.discard(name)
+            visited.add(name)
+            order.append(name)
+
+        for target in targets:
+            if target not in self.producers:
+                raise ValueError(f"No stage produces '{target}'")
+            visit(self.producers[target])
+        return order
+
+    def update_inputs(self, values):
+        # Changing an input drops every memoized stage downstream of it, so the next run only
+        # recomputes what the change can affect
+        stale = set(values)
+        for name in self.execution_order(list(self.producers)):
+            stage = self.stages[name]
+            if name in self.timings and stale.intersection(stage.inputs):
+                del self.timings[name]
+                stale.update(stage.outputs)
+                for output in stage.outputs:
+                    self.values.pop(output, None)
+        self.values.update(values)
+
+    def run(self, targets=None):
+        targets = list(targets or self.producers)
+        for name in self.execution_order(targets):
+            # Stages are memoized for the lifetime of the pipeline
+            if name in self.timings:
+                continue
+            stage = self.stages[name]
+            start = time.perf_counter()
+            result = stage.func(*(self.values[input_name] for input_name in stage.inputs))
+            self.timings[name] = time.perf_counter() - start
+
+            results = (result,) if len(stage.outputs) == 1 else result
+            self.values.update(zip(stage.outputs, results))
+            logging.info(f"Stage '{name}' finished in {self.timings[name]:.2f}s")
+
+        return {target: self.values[target] for target in targets}
+
+    def log_timings(self):
+        total = sum(self.timings.values())
+        for name, elapsed in sorted(self.timings.items(), key=lambda item: item[1], reverse=True):
+            logging.info(f"  {name}: {elapsed:.2f}s ({elapsed / total:.0%})" if total else f"  {name}: {elapsed:.2f}s")
+        logging.info(f"Pipeline total: {total:.2f}s across {len(self.timings)} stages")
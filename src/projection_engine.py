@@ -0,0 +1,28 @@
+import numpy as np
+
+def _as_column(values, num_sets):
+    # Scalars apply to every assumption set; per-set values become an (n, 1) column for broadcasting
+    return np.broadcast_to(np.asarray(values, dtype=np.float64), (num_sets,)).reshape(num_sets, 1)
+
+def project_batch(som, growth_rates, ebitda_margin=0.15, discount_rate=0.12):
+    # growth_rates is (n, years - 1); som, ebitda_margin and discount_rate are scalars or length-n arrays
+    growth_rates = np.atleast_2d(np.asarray(growth_rates, dtype=np.float64))
+    num_sets, num_rates = growth_rates.shape
+    years = np.arange(1, num_rates + 2, dtype=np.float64)
+
+    # Cumulative product over [SOM, rate_1, rate_2, ...] multiplies in the same order as compounding year by year
+    revenue = np.empty((num_sets, num_rates + 1))
+    revenue[:, 0] = _as_column(som, num_sets)[:, 0]
+    revenue[:, 1:] = growth_rates
+    np.cumprod(revenue, axis=1, out=revenue)
+
+    ebitda = revenue * _as_column(ebitda_margin, num_sets)
+    discount_factors = (1 + _as_column(discount_rate, num_sets)) ** years
+    return {
+        'years': years,
+        'revenue_projections': revenue,
+        'ebitda_projections': ebitda,
+        'npv_projections': revenue / discount_factors,
+        'dcf_projections': ebitda / discount_factors,
+        'cagr': (revenue[:, -1] / revenue[:, 0]) ** (1 / num_rates) - 1,
+    }
@@ -1,40 +1,110 @@
 import numpy as np
+from stress_engine import apply_shocks
 
-def perform_detailed_risk_analysis(financial_data):
-    risk_factors = {
-        'Market Risk': np.random.normal(0.05, 0.02),
-        'Competition Risk': np.random.normal(0.04, 0.015),
-        'Regulatory Risk': np.random.normal(0.03, 0.01),
-        'Operational Risk': np.random.normal(0.035, 0.015),
-        'Technology Risk': np.random.normal(0.025, 0.01)
-    }
-    
-    total_risk = sum(risk_factors.values())
-    impact_on_revenue = total_risk * financial_data['revenue_projections'][-1]
-    impact_on_ebitda = total_risk * financial_data['ebitda_projections'][-1]
-    
-    risk_mitigation_strategies = {
-        'Market Risk': "Diversify product offerings and expand into new markets",
-        'Competition Risk': "Invest in R&D and maintain a strong focus on customer experience",
-        'Regulatory Risk': "Maintain compliance team and actively engage with regulators",
-        'Operational Risk': "Implement robust processes and invest in employee training",
-        'Technology Risk': "Continuous technology upgrades and strong cybersecurity measures"
-    }
-    
-    return {
-        'risk_factors': risk_factors,
-        'total_risk': total_risk,
-        'impact_on_revenue': impact_on_revenue,
-        'impact_on_ebitda': impact_on_ebitda,
-        'risk_mitigation_strategies': risk_mitigation_strategies
-    }
+# Mean and standard deviation of each factor's share of revenue lost
+RISK_FACTORS = {
+    'Market Risk': (0.05, 0.02),
+    'Competition Risk': (0.04, 0.015),
+    'Regulatory Risk': (0.03, 0.01),
+    'Operational Risk': (0.035, 0.015),
+    'Technology Risk': (0.025, 0.01),
+}
 
-def perform_risk_analysis(financial_data):
-    # Placeholder risk analysis
-    total_risk = 0.15  # 15% total risk
-    impact_on_revenue = financial_data['revenue_projections'][4] * total_risk
+# Factor correlations in RISK_FACTORS order; a downturn tends to bring competition and operational strain with it
+DEFAULT_RISK_CORRELATION = np.array([
+    [1.0, 0.5, 0.2, 0.3, 0.2],
+    [0.5, 1.0, 0.1, 0.2, 0.4],
+    [0.2, 0.1, 1.0, 0.2, 0.1],
+    [0.3, 0.2, 0.2, 1.0, 0.3],
+    [0.2, 0.4, 0.1, 0.3, 1.0],
+])
+
+RISK_MITIGATION_STRATEGIES = {
+    'Market Risk': "Diversify product offerings and expand into new markets",
+    'Competition Risk': "Invest in R&D and maintain a strong focus on customer experience",
+    'Regulatory Risk': "Maintain compliance team and actively engage with regulators",
+    'Operational Risk': "Implement robust processes and invest in employee training",
+    'Technology Risk': "Continuous technology upgrades and strong cybersecurity measures"
+}
+
+DEFAULT_NUM_DRAWS = 1_000_000
+DEFAULT_BATCH_SIZE = 250_000
+DEFAULT_CONFIDENCE_LEVELS = (90, 95, 99)
+LOSS_PERCENTILES = (5, 25, 50, 75, 95, 99)
+
+def _factor_draws(seed_sequence, num_draws, means, stds, cholesky):
+    # Correlated normals: independent draws times the transposed Cholesky factor
+    normals = np.random.default_rng(seed_sequence).standard_normal((num_draws, len(means)))
+    return means + stds * (normals @ cholesky.T)
+
+def simulate_risk_losses(revenue, ebitda, num_draws=DEFAULT_NUM_DRAWS, correlation=None, seed=None,
+                         batch_size=DEFAULT_BATCH_SIZE, confidence_levels=DEFAULT_CONFIDENCE_LEVELS):
+    names = list(RISK_FACTORS)
+    means, stds = np.array(list(RISK_FACTORS.values())).T
+    correlation = DEFAULT_RISK_CORRELATION if correlation is None else np.asarray(correlation, dtype=np.float64)
+    try:
+        cholesky = np.linalg.cholesky(correlation)
+    except np.linalg.LinAlgError:
+        raise ValueError("Risk correlation matrix must be symmetric positive definite") from None
+
+    # Batches are regenerated from their own seeds, so the second pass sees the same draws without keeping them
+    batch_sizes = [min(batch_size, num_draws - start) for start in range(0, num_draws, batch_size)]
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+
+    # First pass: the total revenue share lost per draw, for the loss quantiles
+    totals = np.concatenate([_factor_draws(seed_sequence, size, means, stds, cholesky).sum(axis=1)
+                             for seed_sequence, size in zip(seed_sequences, batch_sizes)])
+    levels = np.asarray(confidence_levels) / 100
+    var_shares = np.quantile(totals, levels)
+
+    # Second pass: tail averages for CVaR and each factor's share of the tail (Euler allocation)
+    tail_counts = np.zeros(len(levels))
+    tail_factor_sums = np.zeros((len(levels), len(names)))
+    for seed_sequence, size in zip(seed_sequences, batch_sizes):
+        factors = _factor_draws(seed_sequence, size, means, stds, cholesky)
+        in_tail = factors.sum(axis=1)[np.newaxis, :] >= var_shares[:, np.newaxis]
+        tail_counts += in_tail.sum(axis=1)
+        tail_factor_sums += in_tail.astype(np.float64) @ factors
+    tail_factor_means = tail_factor_sums / tail_counts[:, np.newaxis]
+    cvar_shares = tail_factor_means.sum(axis=1)
+
+    def losses(shares):
+        # Revenue lost in proportion to the shares; EBITDA through the stress engine's operating leverage
+        shares = np.asarray(shares, dtype=np.float64)
+        stressed = apply_shocks([revenue], [ebitda], np.ones((len(shares), 1)), shares)
+        return revenue * shares, ebitda - stressed['ebitda'][:, 0]
+
+    revenue_var, ebitda_var = losses(var_shares)
+    revenue_cvar, ebitda_cvar = losses(cvar_shares)
+    revenue_percentiles, ebitda_percentiles = losses(np.percentile(totals, LOSS_PERCENTILES))
+    mean_share = float(totals.mean())
+    mean_revenue_loss, mean_ebitda_loss = losses([mean_share])
+    tail_shares = tail_factor_means / cvar_shares[:, np.newaxis]
 
     return {
-        'total_risk': total_risk,
-        'impact_on_revenue': impact_on_revenue
+        'num_draws': num_draws,
+        'total_risk': mean_share,
+        'impact_on_revenue': float(mean_revenue_loss[0]),
+        'impact_on_ebitda': float(mean_ebitda_loss[0]),
+        'revenue_loss_percentiles': dict(zip(LOSS_PERCENTILES, revenue_percentiles.tolist())),
+        'ebitda_loss_percentiles': dict(zip(LOSS_PERCENTILES, ebitda_percentiles.tolist())),
+        'revenue_var': dict(zip(confidence_levels, revenue_var.tolist())),
+        'revenue_cvar': dict(zip(confidence_levels, revenue_cvar.tolist())),
+        'ebitda_var': dict(zip(confidence_levels, ebitda_var.tolist())),
+        'ebitda_cvar': dict(zip(confidence_levels, ebitda_cvar.tolist())),
+        'tail_contributions': {level: dict(zip(names, shares.tolist())) for level, shares in zip(confidence_levels, tail_shares)},
     }
+
+def perform_detailed_risk_analysis(financial_data, year=5, **simulation_kwargs):
+    # Losses against the given projection year's revenue and EBITDA
+    risk_analysis = simulate_risk_losses(financial_data['revenue_projections'][year - 1],
+                                         financial_data['ebitda_projections'][year - 1], **simulation_kwargs)
+    worst_level = max(risk_analysis['tail_contributions'])
+    contributions = risk_analysis['tail_contributions'][worst_level]
+    risk_analysis['top_tail_factor'] = max(contributions, key=contributions.get)
+    risk_analysis['top_tail_share'] = contributions[risk_analysis['top_tail_factor']]
+    risk_analysis['risk_mitigation_strategies'] = RISK_MITIGATION_STRATEGIES
+    return risk_analysis
+
+def perform_risk_analysis(financial_data):
+    return perform_detailed_risk_analysis(financial_data, seed=0)
@@ -1,24 +1,30 @@
-import matplotlib.pyplot as plt
-import pandas as pd
+from chart_output import save_chart
+import numpy as np
 
 def generate_scenario_analysis_chart(image_path, financial_data):
+    import matplotlib.pyplot as plt
     scenarios = financial_data['scenario_data']['scenarios']
     revenues = financial_data['scenario_data']['revenues']
     costs = financial_data['scenario_data']['costs']
     profits = financial_data['scenario_data']['profits']
 
-    df = pd.DataFrame({
-        'Scenario': scenarios,
-        'Revenue': revenues,
-        'Costs': costs,
-        'Profit': profits
-    })
-
-    ax = df.plot(kind='bar', x='Scenario', stacked=True, figsize=(10, 6), color=['blue', 'orange', 'green'])
-    ax.set_title('Scenario Analysis')
+    # Stacked bars as pandas drew them, without importing pandas for one chart
+    fig, ax = plt.subplots(figsize=(10, 6))
+    bottom = np.zeros(len(scenarios))
+    for label, values, color in (('Revenue', revenues, 'blue'), ('Costs', costs, 'orange'), ('Profit', profits, 'green')):
+        ax.bar(scenarios, values, width=0.5, bottom=bottom, color=color, label=label)
+        bottom += values
+    ax.legend()
+    scenario_data = financial_data['scenario_data']
+    ax.set_title(f"Scenario Analysis (best, base and worst of {scenario_data['num_scenarios']:,} scenarios)")
+    npv = scenario_data['summary']['npv']
+    ax.text(0.99, 0.97, f"Discounted profit across the grid: \\${npv['mean']:,.0f} ± \\${npv['std']:,.0f}",
+            transform=ax.transAxes, ha='right', va='top')
     ax.set_xlabel('Scenario')
+    ax.tick_params(axis='x', labelrotation=0)
     ax.set_ylabel('Amount ($)')
     plt.grid(True)
 
-    plt.savefig(f'{image_path}/scenario_analysis_chart.png')
-    plt.close()
\ No newline at end of file
+    chart = save_chart(image_path, 'scenario_analysis_chart.png')
+    plt.close()
+    return chart
\ No newline at end of file
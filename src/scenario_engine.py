@@ -0,0 +1,110 @@
+import os
+import json
+import numpy as np
+from projection_engine import project_batch
+
+# Scenario axes and the base case picked out of the grid. som_scale and growth_scale are relative to the
+# projection inputs; growth_scale stretches every year's growth above 1x
+SCENARIO_AXES = {
+    'som_scale': np.linspace(0.5, 1.5, 11),
+    'growth_scale': np.linspace(0.5, 1.5, 11),
+    'cost_ratio': np.linspace(0.6, 0.9, 7),
+    'discount_rate': np.linspace(0.08, 0.16, 5),
+}
+BASE_SCENARIO = {'som_scale': 1.0, 'growth_scale': 1.0, 'cost_ratio': 0.7, 'discount_rate': 0.12}
+SCENARIO_OUTPUTS = ('revenue', 'costs', 'profit', 'npv')
+DEFAULT_CHUNK_SIZE = 65536
+
+def evaluate_scenarios(som, growth_rates, axis_values):
+    # axis_values maps each axis to a length-n array; returns final-year revenue, costs and profit and the
+    # discounted profit over the projection
+    batch_rates = 1 + (np.asarray(growth_rates, dtype=np.float64)[np.newaxis, :] - 1) * axis_values['growth_scale'][:, np.newaxis]
+    cost_ratio = axis_values['cost_ratio']
+    projections = project_batch(som * axis_values['som_scale'], batch_rates, 1 - cost_ratio, axis_values['discount_rate'])
+    revenue = projections['revenue_projections'][:, -1]
+    return {
+        'revenue': revenue,
+        'costs': revenue * cost_ratio,
+        'profit': revenue * (1 - cost_ratio),
+        'npv': projections['dcf_projections'].sum(axis=1),
+    }
+
+def _grid_values(axes, flat_index):
+    positions = np.unravel_index(flat_index, [len(values) for values in axes.values()])
+    return {name: values[position] for (name, values), position in zip(axes.items(), positions)}
+
+def _merge_moments(first, second):
+    # Chan et al. pairwise update, as for the Monte Carlo path statistics
+    count = first['count'] + second['count']
+    delta = second['mean'] - first['mean']
+    return {
+        'count': count,
+        'mean': first['mean'] + delta * (second['count'] / count),
+        'm2': first['m2'] + second['m2'] + delta ** 2 * (first['count'] * second['count'] / count),
+    }
+
+def _open_columns(output_dir, axes, num_scenarios):
+    # One preallocated .npy per column; each chunk writes its slice and nothing else stays resident
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'schema.json'), 'w', encoding='utf-8') as f:
+        json.dump({'num_scenarios': num_scenarios, 'axes': {name: values.tolist() for name, values in axes.items()},
+                   'outputs': list(SCENARIO_OUTPUTS)}, f, indent=2)
+    return {name: np.lib.format.open_memmap(os.path.join(output_dir, f'{name}.npy'), mode='w+', dtype=np.float64,
+                                            shape=(num_scenarios,))
+            for name in list(axes) + list(SCENARIO_OUTPUTS)}
+
+def run_scenario_grid(som, growth_rates, axes=None, output_dir=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    axes = {name: np.asarray(values, dtype=np.float64) for name, values in (axes or SCENARIO_AXES).items()}
+    num_scenarios = int(np.prod([len(values) for values in axes.values()]))
+    columns = _open_columns(output_dir, axes, num_scenarios) if output_dir else None
+
+    moments = None
+    best = (-np.inf, 0)
+    worst = (np.inf, 0)
+    try:
+        for start in range(0, num_scenarios, chunk_size):
+            flat_index = np.arange(start, min(start + chunk_size, num_scenarios))
+            axis_values = _grid_values(axes, flat_index)
+            outputs = evaluate_scenarios(som, growth_rates, axis_values)
+
+            if columns:
+                for name, values in {**axis_values, **outputs}.items():
+                    columns[name][start:start + len(flat_index)] = values
+
+            chunk_values = np.stack([outputs[name] for name in SCENARIO_OUTPUTS])
+            chunk_mean = chunk_values.mean(axis=1)
+            chunk_moments = {'count': len(flat_index), 'mean': chunk_mean,
+                             'm2': ((chunk_values - chunk_mean[:, np.newaxis]) ** 2).sum(axis=1)}
+            moments = chunk_moments if moments is None else _merge_moments(moments, chunk_moments)
+
+            npv = outputs['npv']
+            if npv.max() > best[0]:
+                best = (npv.max(), start + int(npv.argmax()))
+            if npv.min() < worst[0]:
+                worst = (npv.min(), start + int(npv.argmin()))
+    finally:
+        if columns:
+            for column in columns.values():
+                column.flush()
+
+    # Selected scenarios are re-evaluated from their grid index instead of being kept from the chunks
+    base_index = np.ravel_multi_index([int(np.abs(values - BASE_SCENARIO[name]).argmin()) for name, values in axes.items()],
+                                      [len(values) for values in axes.values()])
+    selected_index = np.array([best[1], base_index, worst[1]])
+    selected_axes = _grid_values(axes, selected_index)
+    selected = evaluate_scenarios(som, growth_rates, selected_axes)
+
+    std = np.sqrt(moments['m2'] / moments['count'])
+    return {
+        'scenarios': ['Best Case', 'Base Case', 'Worst Case'],
+        'revenues': selected['revenue'].tolist(),
+        'costs': selected['costs'].tolist(),
+        'profits': selected['profit'].tolist(),
+        'assumptions': [{name: float(values[i]) for name, values in selected_axes.items()} for i in range(len(selected_index))],
+        'num_scenarios': num_scenarios,
+        'summary': {name: {'mean': float(moments['mean'][i]), 'std': float(std[i])} for i, name in enumerate(SCENARIO_OUTPUTS)},
+    }
+
+def load_scenario_column(output_dir, name):
+    # Memory-mapped, so summary passes over a large grid read it from disk a page at a time
+    return np.load(os.path.join(output_dir, f'{name}.npy'), mmap_mode='r')
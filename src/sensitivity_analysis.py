@@ -1,19 +1,34 @@
-import matplotlib.pyplot as plt
+from chart_output import save_chart
 import numpy as np
 
 def generate_sensitivity_analysis_chart(image_path, financial_data):
-    parameters = ['Customer Acquisition Cost', 'Retention Rate', 'Pricing']
-    sensitivities = [0.8, 0.6, 0.7]  # Example values, adjust based on your analysis
+    import matplotlib.pyplot as plt
+    sensitivity_data = financial_data['sensitivity_data']
+    # Discounted EBITDA, so margin drivers such as CAC show up alongside the revenue drivers
+    low = np.array(sensitivity_data['dcf_low']) * 100
+    high = np.array(sensitivity_data['dcf_high']) * 100
+    labels = [f"{name} (±{step:.0%})" for name, step in zip(sensitivity_data['parameters'], sensitivity_data['sensitivities'])]
+
+    # Widest swing on top, as in a tornado chart
+    order = np.argsort(np.abs(high - low))
+    labels = [labels[i] for i in order]
+    low, high = low[order], high[order]
 
     plt.figure(figsize=(12, 7))
-    plt.barh(parameters, sensitivities)
-    plt.xlabel('Sensitivity')
+    plt.barh(labels, low, color='#d62728', label='Parameter decreased')
+    plt.barh(labels, high, color='#2ca02c', label='Parameter increased')
+    plt.axvline(0, color='black', linewidth=1)
+    plt.xlabel('Change in discounted cash flow (%)')
     plt.title('Sensitivity Analysis of Key Parameters')
-    plt.xlim(0, 1)
+    plt.legend(loc='lower right')
 
-    for i, v in enumerate(sensitivities):
-        plt.text(v + 0.01, i, f'{v:.2f}', va='center')
+    limit = max(np.abs(low).max(), np.abs(high).max()) * 1.25
+    plt.xlim(-limit, limit)
+    for i, (lo, hi) in enumerate(zip(low, high)):
+        for v in (lo, hi):
+            plt.text(v + (0.01 if v >= 0 else -0.01) * limit, i, f'{v:+.2f}%', va='center', ha='left' if v >= 0 else 'right')
 
     plt.tight_layout()
-    plt.savefig(f'{image_path}/sensitivity_analysis_chart.png', dpi=300, bbox_inches='tight')
-    plt.close()
\ No newline at end of file
+    chart = save_chart(image_path, 'sensitivity_analysis_chart.png', dpi=300, bbox_inches='tight')
+    plt.close()
+    return chart
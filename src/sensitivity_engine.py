@@ -0,0 +1,192 @@
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from projection_engine import project_batch
+
+# Unit-economics drivers of the projection model. Each one is swung by its relative step around its base value
+SENSITIVITY_PARAMETERS = {
+    'Customer Acquisition Cost': {'base_value': 200, 'step': 0.10},
+    'Retention Rate': {'base_value': 0.90, 'step': 0.05},
+    'Conversion Rate': {'base_value': 0.05, 'step': 0.05},
+    'Pricing': {'base_value': 1.0, 'step': 0.05},
+}
+
+# Share of revenue spent on acquisition at the base CAC; a CAC change moves the EBITDA margin by this share
+ACQUISITION_SPEND_SHARE = 0.30
+
+def _driver_ratios(values):
+    # Each driver as a ratio to its base value, shaped (n,) for broadcasting against the batch
+    return {name: values[:, i] / spec['base_value'] for i, (name, spec) in enumerate(SENSITIVITY_PARAMETERS.items())}
+
+def evaluate_drivers(som, growth_rates, ebitda_margin, discount_rate, values):
+    # values is (n, len(SENSITIVITY_PARAMETERS)); every row is one assumption set evaluated in a single batch
+    ratios = _driver_ratios(np.atleast_2d(np.asarray(values, dtype=np.float64)))
+    growth_rates = np.asarray(growth_rates, dtype=np.float64)
+
+    # Conversion and pricing scale the revenue base. Each year's growth multiplier is the retained share of
+    # last year's revenue plus new business, so a retention change shifts it one for one. CAC moves
+    # acquisition spend in or out of the EBITDA margin
+    retention = SENSITIVITY_PARAMETERS['Retention Rate']['base_value'] * (ratios['Retention Rate'] - 1)
+    batch_som = som * ratios['Conversion Rate'] * ratios['Pricing']
+    batch_rates = growth_rates[np.newaxis, :] + retention[:, np.newaxis]
+    batch_margin = ebitda_margin - ACQUISITION_SPEND_SHARE * (ratios['Customer Acquisition Cost'] - 1)
+    projections = project_batch(batch_som, batch_rates, batch_margin, discount_rate)
+    return {
+        'revenue': projections['revenue_projections'].sum(axis=1),
+        'ebitda': projections['ebitda_projections'].sum(axis=1),
+        'npv': projections['npv_projections'].sum(axis=1),
+        'dcf': projections['dcf_projections'].sum(axis=1),
+    }
+
+def run_tornado_analysis(som, growth_rates, ebitda_margin=0.15, discount_rate=0.12):
+    names = list(SENSITIVITY_PARAMETERS)
+    base_values = np.array([spec['base_value'] for spec in SENSITIVITY_PARAMETERS.values()], dtype=np.float64)
+    steps = np.array([spec['step'] for spec in SENSITIVITY_PARAMETERS.values()])
+
+    # Row 0 is the base case, then one row per parameter moved down and one moved up
+    num_params = len(names)
+    values = np.tile(base_values, (2 * num_params + 1, 1))
+    index = np.arange(num_params)
+    values[1 + index, index] *= 1 - steps
+    values[1 + num_params + index, index] *= 1 + steps
+    outcomes = evaluate_drivers(som, growth_rates, ebitda_margin, discount_rate, values)
+
+    sensitivity_data = {
+        'parameters': names,
+        'base_values': base_values.tolist(),
+        'sensitivities': steps.tolist(),
+    }
+    for metric, totals in outcomes.items():
+        base = totals[0]
+        sensitivity_data[f'{metric}_low'] = (totals[1:1 + num_params] / base - 1).tolist()
+        sensitivity_data[f'{metric}_high'] = (totals[1 + num_params:] / base - 1).tolist()
+    return sensitivity_data
+
+def swing(sensitivity_data, parameter, metric):
+    # Half the low-to-high range, i.e. the ± impact quoted for a ± step in the parameter
+    i = sensitivity_data['parameters'].index(parameter)
+    return abs(sensitivity_data[f'{metric}_high'][i] - sensitivity_data[f'{metric}_low'][i]) / 2
+
+# Joe and Kuo (2008) primitive polynomials (degree s, coefficients a) and initial direction numbers m
+# for Sobol dimensions 2-16; dimension 1 is the van der Corput sequence
+SOBOL_DIRECTIONS = [
+    (1, 0, (1,)), (2, 1, (1, 3)), (3, 1, (1, 3, 1)), (3, 2, (1, 1, 1)), (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)), (5, 2, (1, 1, 5, 5, 17)), (5, 4, (1, 1, 5, 5, 5)), (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)), (5, 13, (1, 1, 1, 3, 11)), (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)), (6, 13, (1, 1, 1, 15, 21, 21)), (6, 16, (1, 3, 1, 13, 27, 49)),
+]
+SOBOL_BITS = 30
+
+def _direction_numbers(dims):
+    if dims > len(SOBOL_DIRECTIONS) + 1:
+        raise ValueError(f"Sobol sequence supports at most {len(SOBOL_DIRECTIONS) + 1} dimensions, got {dims}")
+    directions = np.zeros((dims, SOBOL_BITS), dtype=np.int64)
+    directions[0] = 1 << np.arange(SOBOL_BITS - 1, -1, -1)
+    for dim, (s, a, m) in enumerate(SOBOL_DIRECTIONS[:dims - 1], start=1):
+        v = directions[dim]
+        for k in range(SOBOL_BITS):
+            if k < s:
+                v[k] = m[k] << (SOBOL_BITS - 1 - k)
+                continue
+            v[k] = v[k - s] ^ (v[k - s] >> s)
+            for l in range(1, s):
+                if (a >> (s - 1 - l)) & 1:
+                    v[k] ^= v[k - l]
+    return directions
+
+def sobol_points(num_points, dims, skip=1):
+    # Gray-code construction, vectorized over points: point i is the XOR of the direction numbers of the set bits of gray(i)
+    index = np.arange(skip, skip + num_points, dtype=np.int64)
+    gray = index ^ (index >> 1)
+    directions = _direction_numbers(dims)
+    points = np.zeros((num_points, dims), dtype=np.int64)
+    for bit in range(SOBOL_BITS):
+        points ^= ((gray >> bit) & 1)[:, np.newaxis] * directions[:, bit]
+    return points / float(1 << SOBOL_BITS)
+
+# Inputs of the global analysis and their uniform ranges. 'growth_scale' stretches every year's growth
+# above 1x; the SOM range is relative to the base SOM
+GLOBAL_FACTORS = {
+    'som': (0.7, 1.3),
+    'growth_scale': (0.7, 1.3),
+    'ebitda_margin': (0.10, 0.20),
+    'discount_rate': (0.08, 0.16),
+    'mc_growth_rate': (0.15, 0.35),
+    'mc_volatility': (0.05, 0.25),
+}
+DEFAULT_SOBOL_SAMPLES = 1024
+DEFAULT_SOBOL_PATHS = 1000
+SOBOL_BLOCK_SIZE = 256
+
+def _evaluate_global_block(block):
+    # Every row of factors is one model run: the projection model plus a Monte Carlo over shared normal draws,
+    # so the unicorn probability is a deterministic function of the factors
+    factors, som, growth_rates, normals, growth_cap, unicorn_threshold = block
+    som_scale, growth_scale, ebitda_margin, discount_rate, mc_growth_rate, mc_volatility = factors.T
+    batch_som = som * som_scale
+    batch_rates = 1 + (np.asarray(growth_rates)[np.newaxis, :] - 1) * growth_scale[:, np.newaxis]
+    projections = project_batch(batch_som, batch_rates, ebitda_margin, discount_rate)
+
+    growth = mc_growth_rate[:, np.newaxis, np.newaxis] + mc_volatility[:, np.newaxis, np.newaxis] * normals
+    np.minimum(growth, growth_cap, out=growth)
+    growth += 1.0
+    np.cumprod(growth, axis=2, out=growth)
+    growth *= batch_som[:, np.newaxis, np.newaxis]
+    return {
+        'dcf': projections['dcf_projections'].sum(axis=1),
+        'unicorn_probability': (growth.max(axis=2) >= unicorn_threshold).mean(axis=1),
+    }
+
+def _sobol_indices(f_a, f_b, f_ab):
+    # Saltelli (2010) first-order and Jansen total-effect estimators; f_ab[i] has column i taken from B
+    variance = np.var(np.concatenate([f_a, f_b]))
+    if variance == 0:
+        return np.zeros(len(f_ab)), np.zeros(len(f_ab))
+    first_order = np.mean(f_b * (f_ab - f_a), axis=1) / variance
+    total = 0.5 * np.mean((f_a - f_ab) ** 2, axis=1) / variance
+    return first_order, total
+
+def run_sobol_analysis(som, growth_rates, num_samples=DEFAULT_SOBOL_SAMPLES, num_paths=DEFAULT_SOBOL_PATHS, num_years=10,
+                       growth_cap=2.0, unicorn_threshold=1e9, seed=None, num_workers=None):
+    names = list(GLOBAL_FACTORS)
+    num_factors = len(names)
+    low, high = np.array(list(GLOBAL_FACTORS.values())).T
+
+    # One 2k-dimensional Sobol sequence gives both base matrices; each AB_i is A with column i from B
+    points = low + sobol_points(num_samples, 2 * num_factors).reshape(num_samples, 2, num_factors) * (high - low)
+    a, b = points[:, 0], points[:, 1]
+    ab = np.repeat(a[np.newaxis], num_factors, axis=0)
+    ab[np.arange(num_factors), :, np.arange(num_factors)] = b.T
+    factors = np.concatenate([a, b, ab.reshape(-1, num_factors)])
+
+    # N x (k + 2) model runs, split into blocks that share the same normal draws
+    normals = np.random.default_rng(seed).standard_normal((num_paths, num_years))
+    blocks = (
+        (factors[start:start + SOBOL_BLOCK_SIZE], som, growth_rates, normals, growth_cap, unicorn_threshold)
+        for start in range(0, len(factors), SOBOL_BLOCK_SIZE)
+    )
+    num_blocks = -(-len(factors) // SOBOL_BLOCK_SIZE)
+    num_workers = min(num_workers or os.cpu_count() or 1, num_blocks)
+    executor = ProcessPoolExecutor(max_workers=num_workers) if num_workers > 1 else None
+    try:
+        block_results = list(executor.map(_evaluate_global_block, blocks) if executor else map(_evaluate_global_block, blocks))
+    finally:
+        if executor:
+            executor.shutdown()
+
+    results = {'factors': names, 'num_samples': num_samples, 'num_evaluations': len(factors)}
+    for output in block_results[0]:
+        values = np.concatenate([block[output] for block in block_results])
+        f_a, f_b = values[:num_samples], values[num_samples:2 * num_samples]
+        f_ab = values[2 * num_samples:].reshape(num_factors, num_samples)
+        first_order, total = _sobol_indices(f_a, f_b, f_ab)
+        results[output] = {'first_order': first_order.tolist(), 'total': total.tolist()}
+    return results
+
+def log_sobol_report(results):
+    logging.info(f"Global sensitivity: {results['num_evaluations']} model runs ({results['num_samples']} Sobol samples)")
+    for output in ('dcf', 'unicorn_probability'):
+        logging.info(f"  {output}:")
+        for name, first_order, total in zip(results['factors'], results[output]['first_order'], results[output]['total']):
+            logging.info(f"    {name}: first-order {first_order:.3f}, total {total:.3f}")
@@ -0,0 +1,190 @@
+import os
+import re
+import json
+import pickle
+import hashlib
+import logging
+from collections import OrderedDict
+from string import Formatter
+
+TEMPLATE_DIR = os.environ.get('PITCHDECK_TEMPLATE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates'))
+DEFAULT_TEMPLATE = os.path.join(TEMPLATE_DIR, 'pitch_deck.json')
+
+# Defaults for every element type, mirroring the FPDF call each one becomes
+ELEMENT_DEFAULTS = {
+    'cell': {'w': 0, 'h': 10, 'align': ''},
+    'multi_cell': {'w': 0, 'h': 10, 'align': 'J'},
+    'image': {'x': None, 'y': None, 'w': 0, 'h': 0},
+}
+
+DEFAULT_MAX_SLIDES = 256
+
+# Compiled templates shared by every deck in the process, keyed by template path
+_template_registry = {}
+
+# One '.attribute' or '[key]' step of a placeholder's field path, following str.format's field grammar
+_FIELD_STEP = re.compile(r'\.([^.[]+)|\[([^\]]+)\]')
+
+def _field_key(key):
+    # As in str.format, digit-only keys are integer indices and everything else is a string key
+    return int(key) if key.isdigit() else key
+
+def _compile_field(field_name):
+    # '{revenue_projections[4]}' becomes ('revenue_projections', ((False, 4),)); resolved with plain lookups at render time
+    first = re.match(r'[^.[]*', field_name).group()
+    rest = []
+    position = len(first)
+    while position < len(field_name):
+        step = _FIELD_STEP.match(field_name, position)
+        if step is None:
+            raise ValueError(f"Invalid placeholder field: {field_name!r}")
+        attribute, key = step.groups()
+        rest.append((True, attribute) if attribute is not None else (False, _field_key(key)))
+        position = step.end()
+    return _field_key(first), tuple(rest)
+
+def compile_text(text):
+    # Text without placeholders stays a plain string; otherwise a tuple of literals and compiled fields
+    parts = []
+    for literal, field_name, format_spec, conversion in Formatter().parse(text):
+        if literal:
+            parts.append(literal)
+        if field_name is not None:
+            if not field_name:
+                raise ValueError(f"Positional placeholder in template text: {text!r}")
+            parts.append((_compile_field(field_name), conversion, format_spec))
+    if all(isinstance(part, str) for part in parts):
+        return ''.join(parts)
+    return tuple(parts)
+
+def _resolve(field, context):
+    first, rest = field
+    value = context[first]
+    for is_attribute, key in rest:
+        value = getattr(value, key) if is_attribute else value[key]
+    return value
+
+def render_text(compiled_text, context):
+    if isinstance(compiled_text, str):
+        return compiled_text
+    rendered = []
+    for part in compiled_text:
+        if isinstance(part, str):
+            rendered.append(part)
+            continue
+        field, conversion, format_spec = part
+        value = _resolve(field, context)
+        if conversion == 'r':
+            value = repr(value)
+        elif conversion == 's':
+            value = str(value)
+        rendered.append(format(value, format_spec))
+    return ''.join(rendered)
+
+def compile_template(spec):
+    styles = {name: (style['family'], style.get('style', ''), style['size']) for name, style in spec['styles'].items()}
+    slides = []
+    for slide in spec['slides']:
+        elements = []
+        for element in slide['elements']:
+            element_type = element['type']
+            if element_type not in ELEMENT_DEFAULTS:
+                raise ValueError(f"Unknown element type '{element_type}' in slide '{slide['name']}'")
+            compiled = dict(ELEMENT_DEFAULTS[element_type], **element)
+            if element_type == 'image':
+                compiled['chart'] = compile_text(element['chart'])
+            else:
+                if element.get('style') not in styles:
+                    raise ValueError(f"Unknown style '{element.get('style')}' in slide '{slide['name']}'")
+                compiled['font'] = styles[element['style']]
+                compiled['text'] = compile_text('\n'.join(element['lines']) if 'lines' in element else element['text'])
+            elements.append(compiled)
+        slides.append({'name': slide['name'], 'elements': elements})
+    return {'slides': slides}
+
+def load_template(template_path=DEFAULT_TEMPLATE):
+    # Parsed and compiled once per process, and again only if the file changes
+    template_path = os.path.abspath(template_path)
+    mtime = os.stat(template_path).st_mtime_ns
+    if template_path not in _template_registry or _template_registry[template_path][0] != mtime:
+        with open(template_path, encoding='utf-8') as f:
+            _template_registry[template_path] = (mtime, compile_template(json.load(f)))
+    return _template_registry[template_path][1]
+
+class SlideCache:
+    # Recorded slides keyed by everything that reaches the page: the rendered text, the chart
+    # contents and the font the slide starts in. A changed assumption only misses on the slides
+    # whose numbers or charts it actually changes
+    def __init__(self, max_slides=DEFAULT_MAX_SLIDES):
+        self.max_slides = max_slides
+        self.slides = OrderedDict()
+        self.hits = []
+        self.misses = []
+
+    def key(self, name, elements, start_font):
+        payload = [(element['type'], _source_digest(element['source'])) if element['type'] == 'image' else element
+                   for element in elements]
+        return hashlib.sha256(pickle.dumps((name, payload, start_font), protocol=4)).hexdigest()
+
+    def fetch(self, name, key):
+        if key not in self.slides:
+            self.misses.append(name)
+            return None
+        self.slides.move_to_end(key)
+        self.hits.append(name)
+        return self.slides[key]
+
+    def store(self, key, record):
+        self.slides[key] = record
+        while len(self.slides) > self.max_slides:
+            self.slides.popitem(last=False)
+
+    def log_report(self):
+        total = len(self.hits) + len(self.misses)
+        hit_rate = len(self.hits) / total if total else 0
+        logging.info(f"Slide cache: {len(self.hits)} reused, {len(self.misses)} rebuilt ({hit_rate:.0%} hit rate)")
+        if self.misses:
+            logging.info(f"Rebuilt slides: {', '.join(self.misses)}")
+
+def _source_digest(source):
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha1(source).hexdigest()
+    stat = os.stat(source)
+    return os.path.abspath(source), stat.st_size, stat.st_mtime_ns
+
+def _resolve_element(element, context, chart_source):
+    if element['type'] == 'image':
+        return {'type': 'image', 'source': chart_source(render_text(element['chart'], context)),
+                'x': element['x'], 'y': element['y'], 'w': element['w'], 'h': element['h']}
+    return {'type': element['type'], 'font': element['font'], 'w': element['w'], 'h': element['h'],
+            'align': element['align'], 'text': render_text(element['text'], context)}
+
+def _draw_slide(pdf, elements):
+    pdf.add_page()
+    for element in elements:
+        if element['type'] == 'image':
+            pdf.image(element['source'], x=element['x'], y=element['y'], w=element['w'], h=element['h'])
+            continue
+        pdf.set_font(*element['font'])
+        if element['type'] == 'cell':
+            pdf.cell(element['w'], element['h'], element['text'], ln=True, align=element['align'])
+        else:
+            pdf.multi_cell(element['w'], element['h'], element['text'], align=element['align'])
+
+def render_slide(pdf, slide, context, chart_source, slide_cache=None):
+    # chart_source maps a chart name to something PitchDeckPDF.image accepts: a file path or in-memory bytes
+    elements = [_resolve_element(element, context, chart_source) for element in slide['elements']]
+    if slide_cache is None:
+        _draw_slide(pdf, elements)
+        return
+
+    key = slide_cache.key(slide['name'], elements, (pdf.font_family, pdf.font_style, pdf.font_size_pt))
+    record = slide_cache.fetch(slide['name'], key)
+    if record is None:
+        slide_cache.store(key, pdf.record_page(lambda: _draw_slide(pdf, elements)))
+    else:
+        pdf.restore_page(record)
+
+def render_template(pdf, template, context, chart_source, slide_cache=None):
+    for slide in template['slides']:
+        render_slide(pdf, slide, context, chart_source, slide_cache)
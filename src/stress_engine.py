@@ -0,0 +1,80 @@
+import numpy as np
+
+# Shock paths: revenue falls by 'depth' from 'start_year', stays down for 'duration' years and
+# recovers linearly over 'recovery' years
+STRESS_SCENARIOS = {
+    'Economic Downturn': {'depth': 0.20, 'start_year': 3, 'duration': 2, 'recovery': 3},
+    'Regulatory Changes': {'depth': 0.15, 'start_year': 2, 'duration': 3, 'recovery': 2},
+    'Increased Competition': {'depth': 0.10, 'start_year': 2, 'duration': 5, 'recovery': 5},
+}
+
+# Share of the cost base that moves with revenue during a shock; the rest is fixed in the short run
+DEFAULT_COST_FLEXIBILITY = 0.5
+BISECTION_STEPS = 40
+
+def shock_profiles(years, start_year, duration, recovery):
+    # (n, num_years) fraction of the full shock applied in each year; all arguments broadcast over n scenarios
+    years = np.asarray(years, dtype=np.float64)[np.newaxis, :]
+    start_year = np.asarray(start_year, dtype=np.float64).reshape(-1, 1)
+    duration = np.asarray(duration, dtype=np.float64).reshape(-1, 1)
+    recovery = np.asarray(recovery, dtype=np.float64).reshape(-1, 1)
+
+    since_end = years - (start_year + duration)
+    recovering = 1 - (since_end + 1) / np.maximum(recovery + 1, 1)
+    profile = np.where(since_end < 0, 1.0, np.clip(recovering, 0, 1))
+    return np.where(years < start_year, 0.0, profile)
+
+def apply_shocks(revenue, ebitda, profiles, depth, cost_flexibility=DEFAULT_COST_FLEXIBILITY, initial_cash=0.0):
+    # revenue and ebitda are the base projection (num_years,); profiles is (n, num_years) and depth (n,)
+    revenue = np.asarray(revenue, dtype=np.float64)
+    costs = revenue - np.asarray(ebitda, dtype=np.float64)
+    lost_revenue = revenue * profiles * np.asarray(depth, dtype=np.float64).reshape(-1, 1)
+    stressed_revenue = revenue - lost_revenue
+    stressed_ebitda = stressed_revenue - costs * (1 - cost_flexibility * lost_revenue / revenue)
+    return {
+        'revenue': stressed_revenue,
+        'ebitda': stressed_ebitda,
+        'cash': initial_cash + np.cumsum(stressed_ebitda, axis=1),
+    }
+
+def run_stress_tests(years, revenue, ebitda, scenarios=None, cost_flexibility=DEFAULT_COST_FLEXIBILITY):
+    scenarios = scenarios or STRESS_SCENARIOS
+    names = list(scenarios)
+    specs = [scenarios[name] for name in names]
+    profiles = shock_profiles(years, *[[spec[key] for spec in specs] for key in ('start_year', 'duration', 'recovery')])
+    stressed = apply_shocks(revenue, ebitda, profiles, [spec['depth'] for spec in specs], cost_flexibility)
+
+    base_ebitda = np.sum(ebitda)
+    return {
+        'scenarios': names,
+        'profiles': profiles.tolist(),
+        'ebitda_paths': stressed['ebitda'].tolist(),
+        'impacts': (stressed['ebitda'].sum(axis=1) - base_ebitda).tolist(),
+        'impact_pct': ((stressed['ebitda'].sum(axis=1) - base_ebitda) / base_ebitda).tolist(),
+        'min_ebitda': stressed['ebitda'].min(axis=1).tolist(),
+    }
+
+def reverse_stress_test(revenue, ebitda, profiles, limits, metric='ebitda', cost_flexibility=DEFAULT_COST_FLEXIBILITY,
+                        initial_cash=0.0, steps=BISECTION_STEPS):
+    # Smallest shock depth that takes the lowest yearly EBITDA (or cash balance) below each limit. Every
+    # (profile, limit) pair is bisected at once; pairs that survive even a total revenue loss get NaN
+    profiles = np.atleast_2d(np.asarray(profiles, dtype=np.float64))
+    limits = np.asarray(limits, dtype=np.float64)
+    profile_rows = np.repeat(profiles, len(limits), axis=0)
+    limit_rows = np.tile(limits, len(profiles))
+
+    def breaches(depth):
+        stressed = apply_shocks(revenue, ebitda, profile_rows, depth, cost_flexibility, initial_cash)
+        return stressed[metric].min(axis=1) < limit_rows
+
+    low = np.zeros(len(limit_rows))
+    high = np.ones(len(limit_rows))
+    for _ in range(steps):
+        middle = (low + high) / 2
+        breached = breaches(middle)
+        high = np.where(breached, middle, high)
+        low = np.where(breached, low, middle)
+
+    depth = np.where(breaches(np.ones(len(limit_rows))), high, np.nan)
+    depth = np.where(breaches(np.zeros(len(limit_rows))), 0.0, depth)
+    return depth.reshape(len(profiles), len(limits))
@@ -1,13 +1,36 @@
-import matplotlib.pyplot as plt
+from chart_output import save_chart
+import numpy as np
 
 def generate_stress_testing_chart(image_path, financial_data):
-    stress_tests = financial_data['stress_test_data']['scenarios']
-    impacts = financial_data['stress_test_data']['impacts']
-
-    plt.figure(figsize=(10, 6))
-    plt.bar(stress_tests, impacts, color=['blue', 'orange', 'green'])
-    plt.xlabel('Stress Test')
-    plt.ylabel('Impact on Profitability (%)')
-    plt.title('Stress Testing Analysis')
-    plt.savefig(f'{image_path}/stress_testing_chart.png')
+    import matplotlib.pyplot as plt
+    stress_test_data = financial_data['stress_test_data']
+    stress_tests = stress_test_data['scenarios']
+    impacts = np.array(stress_test_data['impact_pct']) * 100
+    colors = ['blue', 'orange', 'green']
+
+    fig, (ax_impact, ax_paths) = plt.subplots(1, 2, figsize=(14, 6))
+    bars = ax_impact.bar(stress_tests, impacts, color=colors)
+    # Reverse stress test result: the depth of the same shock path at which EBITDA turns negative
+    ax_impact.bar_label(bars, labels=[f'EBITDA < 0 at {depth:.0%} shock' if depth == depth else 'EBITDA stays positive'
+                                      for depth in stress_test_data['breaking_depth_ebitda']], padding=3)
+    ax_impact.set_xlabel('Stress Test')
+    ax_impact.set_ylabel('Impact on Cumulative EBITDA (%)')
+    ax_impact.set_title('Stress Testing Analysis')
+    ax_impact.margins(y=0.1)
+    ax_impact.tick_params(axis='x', labelrotation=15)
+
+    years = financial_data['years']
+    ax_paths.plot(years, financial_data['ebitda_projections'], color='black', linewidth=2, label='Base Case')
+    for name, path, color in zip(stress_tests, stress_test_data['ebitda_paths'], colors):
+        ax_paths.plot(years, path, color=color, label=name)
+    if min(stress_test_data['min_ebitda']) > 0:
+        ax_paths.set_yscale('log')
+    ax_paths.set_xlabel('Year')
+    ax_paths.set_ylabel('EBITDA ($)')
+    ax_paths.set_title('EBITDA Under Stress')
+    ax_paths.legend()
+
+    plt.tight_layout()
+    chart = save_chart(image_path, 'stress_testing_chart.png')
     plt.close()
+    return chart
@@ -1,9 +1,9 @@
-import matplotlib.pyplot as plt
+from chart_output import save_chart
 
-def generate_tam_sam_som_data():
-    tam = 100000000000  # Total Addressable Market: $100 billion (global insurance market)
-    sam = tam * 0.05    # Serviceable Available Market: 5% of TAM (specific insurance segments)
-    som = sam * 0.02    # Serviceable Obtainable Market: 2% of SAM (realistic market capture)
+def generate_tam_sam_som_data(tam=100000000000, sam_share=0.05, som_share=0.02):
+    # tam: Total Addressable Market, $100 billion by default (global insurance market)
+    sam = tam * sam_share    # Serviceable Available Market: 5% of TAM by default (specific insurance segments)
+    som = sam * som_share    # Serviceable Obtainable Market: 2% of SAM by default (realistic market capture)
     
     return {
         'TAM': tam,
@@ -12,6 +12,7 @@ def generate_tam_sam_som_data():
     }
 
 def generate_tam_sam_som_chart(tam_sam_som_data, image_path):
+    import matplotlib.pyplot as plt
     sizes = list(tam_sam_som_data.values())
     labels = list(tam_sam_som_data.keys())
 
@@ -19,5 +20,6 @@ def generate_tam_sam_som_chart(tam_sam_som_data, image_path):
     plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
     plt.axis('equal')
     plt.title('TAM, SAM, SOM Analysis')
-    plt.savefig(f'{image_path}/tam_sam_som_chart.png')
-    plt.close()
\ No newline at end of file
+    chart = save_chart(image_path, 'tam_sam_som_chart.png')
+    plt.close()
+    return chart
\ No newline at end of file
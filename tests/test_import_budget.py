@@ -0,0 +1,41 @@
+import os
+import sys
+import json
+import subprocess
+
+# Modules in src/ import each other by bare name, as when the entry points are run as scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from import_budget import IMPORT_BUDGETS, check_import_budgets
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# Renders the analysis charts in memory through the given cache, in a fresh interpreter, and reports
+# the cache outcome and whether matplotlib was loaded
+_RENDER_CHARTS = """
+import sys, json
+from chart_cache import ChartCache
+from financial_analysis import build_analysis_stages
+from pipeline import Pipeline
+cache = ChartCache(sys.argv[1])
+Pipeline(build_analysis_stages(max_workers=1, chart_cache=cache, quality='draft'), inputs={'image_path': None, 'assumptions': {}}).run(['charts'])
+print(json.dumps({'hits': len(cache.hits), 'misses': len(cache.misses), 'matplotlib': 'matplotlib' in sys.modules}))
+"""
+
+def render_charts_in_subprocess(cache_dir):
+    completed = subprocess.run([sys.executable, '-c', _RENDER_CHARTS, cache_dir], cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def test_entry_points_import_within_budget_without_heavy_libraries():
+    assert check_import_budgets() == []
+
+def test_budgets_cover_every_entry_point():
+    assert {'analyze', 'financial_analysis', 'pitch_deck'} <= set(IMPORT_BUDGETS)
+
+def test_all_hit_chart_run_does_not_import_matplotlib(tmp_path):
+    first = render_charts_in_subprocess(str(tmp_path))
+    assert first['misses'] > 0 and first['matplotlib']
+
+    second = render_charts_in_subprocess(str(tmp_path))
+    assert second['misses'] == 0 and second['hits'] == first['misses']
+    assert not second['matplotlib']
@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from monte_carlo import (DEFAULT_PASSAGE_THRESHOLDS, DEFAULT_PERCENTILES, default_bin_edges, finalize_path_statistics,
+                         run_monte_carlo_simulation, run_streaming_monte_carlo_simulation, simulate_revenue_paths,
+                         summarize_paths)
+
+FINANCIAL_DATA = {'revenue_projections': [2e8]}
+NUM_SIMULATIONS = 10_000
+NUM_YEARS = 10
+SEED = 7
+
+def in_memory_results(chunk_size):
+    # The same paths the streamed run draws, one block per SeedSequence child, summarized in a single pass
+    num_blocks = -(-NUM_SIMULATIONS // chunk_size)
+    seed_sequences = np.random.SeedSequence(SEED).spawn(num_blocks)
+    simulations = np.concatenate([
+        simulate_revenue_paths(FINANCIAL_DATA['revenue_projections'][0], min(chunk_size, NUM_SIMULATIONS - index * chunk_size),
+                               NUM_YEARS, seed=seed_sequence)
+        for index, seed_sequence in enumerate(seed_sequences)
+    ])
+    bin_edges = default_bin_edges(FINANCIAL_DATA['revenue_projections'][0], NUM_YEARS)
+    stats = summarize_paths(simulations, bin_edges=bin_edges, passage_thresholds=DEFAULT_PASSAGE_THRESHOLDS)
+    return simulations, bin_edges, finalize_path_statistics(stats, bin_edges, passage_thresholds=DEFAULT_PASSAGE_THRESHOLDS)
+
+@pytest.mark.parametrize('chunk_size', [NUM_SIMULATIONS, 4096, 1000, 333])
+def test_streamed_statistics_match_in_memory_summary(chunk_size):
+    streamed = run_streaming_monte_carlo_simulation(FINANCIAL_DATA, NUM_SIMULATIONS, NUM_YEARS, seed=SEED, chunk_size=chunk_size)
+    simulations, bin_edges, expected = in_memory_results(chunk_size)
+
+    assert streamed['num_simulations'] == NUM_SIMULATIONS
+    assert streamed['unicorn_probability'] == expected['unicorn_probability']
+    assert streamed['avg_unicorn_year'] == pytest.approx(expected['avg_unicorn_year'])
+    assert streamed['mean_first_passage_year'] == pytest.approx(expected['mean_first_passage_year'])
+    np.testing.assert_allclose(streamed['year_mean'], simulations.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(streamed['year_std'], simulations.std(axis=0), rtol=1e-9)
+    np.testing.assert_equal(streamed['first_passage'], expected['first_passage'])
+
+    # Histogram percentiles are exact up to one log-spaced bin of the true sample percentiles
+    bin_ratio = bin_edges[1] / bin_edges[0]
+    for percentile in DEFAULT_PERCENTILES:
+        np.testing.assert_allclose(streamed['percentiles'][percentile], expected['percentiles'][percentile], rtol=1e-12)
+        exact = np.percentile(simulations, percentile, axis=0)
+        assert np.all(np.abs(np.log(streamed['percentiles'][percentile] / exact)) <= np.log(bin_ratio))
+
+@pytest.mark.parametrize('num_simulations, chunk_size', [(0, 1000), (-5, 1000), (1000, 0)])
+def test_streaming_rejects_empty_runs(num_simulations, chunk_size):
+    with pytest.raises(ValueError):
+        run_streaming_monte_carlo_simulation(FINANCIAL_DATA, num_simulations, chunk_size=chunk_size)
+
+def test_mean_first_passage_year_averages_only_paths_that_reach_the_threshold():
+    results = run_monte_carlo_simulation(FINANCIAL_DATA, NUM_SIMULATIONS, NUM_YEARS, seed=SEED)
+    unicorn_years = np.argmax(np.maximum.accumulate(results['simulations'], axis=1) >= 1e9, axis=1) + 1
+    reached = np.any(results['simulations'] >= 1e9, axis=1)
+    assert 0 < reached.mean() < 1
+    assert results['mean_first_passage_year'] == pytest.approx(unicorn_years[reached].mean())
+    assert results['mean_first_passage_year'] < results['avg_unicorn_year']
+
+@pytest.mark.parametrize('run', [run_monte_carlo_simulation, run_streaming_monte_carlo_simulation])
+def test_mean_first_passage_year_is_nan_when_no_path_reaches_the_threshold(run):
+    results = run(FINANCIAL_DATA, 1000, NUM_YEARS, unicorn_threshold=1e15, seed=SEED)
+    assert results['unicorn_probability'] == 0
+    assert np.isnan(results['mean_first_passage_year'])